@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import numpy
+
+class Adjacency(object):
+	# compressed sparse row adjacency; every edge is stored once per endpoint.
+	# all arrays are int32: 24 bytes per edge (source, target and two neighbor / edge id slots) and 4 per vertex
+	def __init__(self, vertexCount, edges=()):
+		edgeArray = numpy.asarray(edges, dtype=numpy.int32).reshape(-1, 2)
+		self.sources = numpy.ascontiguousarray(edgeArray[:, 0])
+		self.targets = numpy.ascontiguousarray(edgeArray[:, 1])
+		ends = numpy.concatenate((self.sources, self.targets))
+		others = numpy.concatenate((self.targets, self.sources))
+		order = numpy.lexsort((others, ends))
+		self.neighbors = others[order]
+		self.edgeIds = (order % max(len(self.sources), 1)).astype(numpy.int32)
+		self.offsets = numpy.zeros(vertexCount + 1, dtype=numpy.int32)
+		numpy.cumsum(numpy.bincount(ends, minlength=vertexCount), out=self.offsets[1:])
+
+	def numOfVertices(self):
+		return len(self.offsets) - 1
+
+	def numOfEdges(self):
+		return len(self.sources)
+
+	def degrees(self):
+		return numpy.diff(self.offsets)
+
+	def degree(self, vertexIndex):
+		return int(self.offsets[vertexIndex + 1] - self.offsets[vertexIndex])
+
+	def neighborsOf(self, vertexIndex):
+		return self.neighbors[self.offsets[vertexIndex]:self.offsets[vertexIndex + 1]]
+
+	def incidentEdges(self, vertexIndex):
+		return self.edgeIds[self.offsets[vertexIndex]:self.offsets[vertexIndex + 1]]
+
+	def rows(self):
+		return numpy.repeat(numpy.arange(self.numOfVertices(), dtype=numpy.int32), self.degrees())
+
+	def edgeList(self):
+		return numpy.stack((self.sources, self.targets), axis=1)
+
+	def withEdges(self, edges, vertexCount=None):
+		if vertexCount is None:
+			vertexCount = self.numOfVertices()
+		added = numpy.asarray(edges, dtype=numpy.int32).reshape(-1, 2)
+		return Adjacency(vertexCount, numpy.concatenate((self.edgeList(), added)))
+
+	def nbytes(self):
+		return self.sources.nbytes + self.targets.nbytes + self.neighbors.nbytes + self.edgeIds.nbytes + self.offsets.nbytes
+
+def connectedComponents(adjacency):
+	# min-label propagation with hooking and pointer jumping;
+	# returns the component count and the component of every vertex, numbered by decreasing size
+	vertexCount = adjacency.numOfVertices()
+	labels = numpy.arange(vertexCount)
+	linked = numpy.nonzero(adjacency.degrees())[0]
+	starts = adjacency.offsets[linked]
+	while True:
+		hooked = labels.copy()
+		if len(linked):
+			hooked[linked] = numpy.minimum(labels[linked], numpy.minimum.reduceat(labels[adjacency.neighbors], starts))
+		# the root a vertex points at adopts the smaller label too
+		numpy.minimum.at(hooked, labels, hooked)
+		while True:
+			jumped = hooked[hooked]
+			if numpy.array_equal(jumped, hooked):
+				break
+			hooked = jumped
+		if numpy.array_equal(hooked, labels):
+			break
+		labels = hooked
+	(roots, inverse, sizes) = numpy.unique(labels, return_inverse=True, return_counts=True)
+	rank = numpy.empty(len(roots), dtype=numpy.intp)
+	rank[numpy.argsort(-sizes, kind="stable")] = numpy.arange(len(roots))
+	return (len(roots), rank[inverse.reshape(-1)])
+
+def adjacencyFromArrays(sources, targets, offsets, neighbors, edgeIds):
+	adjacency = Adjacency.__new__(Adjacency)
+	adjacency.sources = sources
+	adjacency.targets = targets
+	adjacency.offsets = offsets
+	adjacency.neighbors = neighbors
+	adjacency.edgeIds = edgeIds
+	return adjacency
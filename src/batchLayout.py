@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+from concurrent.futures import ProcessPoolExecutor
+import argparse, csv, os, sys, time, numpy
+from src.layout import Layout, anneal
+from src.placement import PLACEMENTS, PLACED_STABILITY, initialPositions
+from src.graphFile import graphName, loadGraph, catalog
+from src.multilevel import multilevelLayout
+from src.components import componentLayout
+
+def layoutFile(path, arguments):
+	startTime = time.perf_counter()
+	(vertexCount, edges, labels) = loadGraph(path)
+	loadTime = time.perf_counter() - startTime
+	layout = Layout(vertexCount, edges, arguments.dimension)
+	layout.barnesHut = arguments.barnesHut
+	layout.theta = arguments.theta
+	iterations = 0
+	if vertexCount > 0 and arguments.multilevel:
+		multilevelLayout(layout, arguments.size, arguments.iterations)
+		iterations = arguments.iterations or int(arguments.size)
+	elif vertexCount > 0 and arguments.components:
+		# the files are already spread over the processes, so the components are annealed in place
+		componentLayout(layout, arguments.size, arguments.placement, arguments.iterations, arguments.tolerance)
+		iterations = arguments.iterations or int(arguments.size)
+	elif vertexCount > 0:
+		layout.positions = initialPositions(arguments.placement, layout.currentAdjacency(), arguments.size * 5 / 8, arguments.size / 4, arguments.dimension)
+		firstStability = 1 if arguments.placement == "circle" else PLACED_STABILITY
+		iterations = anneal(layout, arguments.size, arguments.iterations, arguments.tolerance, firstStability)
+	layoutTime = time.perf_counter() - startTime - loadTime
+	outputPath = os.path.join(arguments.output, graphName(path) + ".csv")
+	numpy.savetxt(outputPath, layout.positions, delimiter=",", fmt="%.6f")
+	return (graphName(path), vertexCount, len(edges), iterations, loadTime, layoutTime)
+
+def parseArguments(argv):
+	parser = argparse.ArgumentParser(description="lay out graph files in parallel and write coordinates as csv")
+	parser.add_argument("paths", nargs="*", help="graph files (default: every module in ./graphData)")
+	parser.add_argument("-o", "--output", default="./layouts", help="output directory")
+	parser.add_argument("-d", "--dimension", type=int, choices=(2, 3), default=2)
+	parser.add_argument("-n", "--iterations", type=int, default=None, help="iteration budget (default: size)")
+	parser.add_argument("-t", "--tolerance", type=float, default=None, help="stop when no vertex moves farther than this")
+	parser.add_argument("-s", "--size", type=float, default=640, help="scene side length")
+	parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes")
+	parser.add_argument("--barnes-hut", dest="barnesHut", action="store_true")
+	parser.add_argument("--theta", type=float, default=0.8)
+	parser.add_argument("--multilevel", action="store_true", help="coarsen, lay out the coarsest graph and refine upward")
+	parser.add_argument("--components", action="store_true", help="lay out every connected component on its own and pack them")
+	parser.add_argument("-p", "--placement", choices=PLACEMENTS, default="circle", help="initial placement before annealing")
+	return parser.parse_args(argv)
+
+def main(argv):
+	arguments = parseArguments(argv)
+	paths = arguments.paths or catalog()
+	os.makedirs(arguments.output, exist_ok=True)
+	results = []
+	with ProcessPoolExecutor(arguments.workers) as executor:
+		futures = [executor.submit(layoutFile, path, arguments) for path in paths]
+		for (path, future) in zip(paths, futures):
+			try:
+				result = future.result()
+			except Exception as error:
+				print(path + ": " + str(error), file=sys.stderr)
+				continue
+			results.append(result)
+			print("%s: %d vertices, %d edges, %d iterations, %.3f s" % (result[0], result[1], result[2], result[3], result[5]))
+	with open(os.path.join(arguments.output, "timing.csv"), "w", newline="", encoding="utf-8") as file:
+		writer = csv.writer(file)
+		writer.writerow(["graph", "vertexCount", "edgeCount", "iterations", "loadSeconds", "layoutSeconds"])
+		writer.writerows(results)
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv[1:]))
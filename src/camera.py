@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import math, numpy
+
+IDENTITY = numpy.array([1.0, 0.0, 0.0, 0.0])
+
+def quaternionProduct(first, second):
+	(w1, x1, y1, z1) = first
+	(w2, x2, y2, z2) = second
+	return numpy.array([w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+		w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+		w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+		w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2])
+
+def axisAngleQuaternion(axis, angle):
+	axis = numpy.asarray(axis, dtype=float)
+	norm = numpy.linalg.norm(axis)
+	if norm == 0 or angle == 0:
+		return IDENTITY.copy()
+	return numpy.concatenate(([math.cos(angle / 2)], axis / norm * math.sin(angle / 2)))
+
+def rotationMatrix(quaternion):
+	(w, x, y, z) = quaternion / numpy.linalg.norm(quaternion)
+	return numpy.array([[1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)],
+		[2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)],
+		[2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)]])
+
+class Camera(object):
+	# view rotation about a pivot, applied to the simulated positions only when they are drawn
+	DEGREES_PER_PIXEL = 1
+	# vertices closer to the eye than this share of the eye distance are clamped
+	NEAR = 0.1
+
+	def __init__(self):
+		self.pivot = numpy.zeros(3)
+		self.distance = 1.0
+		self.reset()
+
+	def reset(self):
+		self.orientation = IDENTITY.copy()
+		self.startOrientation = self.orientation
+		self.rotation = numpy.identity(3)
+
+	def begin(self):
+		self.startOrientation = self.orientation
+
+	def drag(self, dx, dy):
+		# trackball: the view turns about the screen axis perpendicular to the drag, one degree per pixel
+		angle = math.radians(math.hypot(dx, dy) * self.DEGREES_PER_PIXEL)
+		turn = axisAngleQuaternion((-dy, dx, 0), angle)
+		orientation = quaternionProduct(turn, self.startOrientation)
+		self.orientation = orientation / numpy.linalg.norm(orientation)
+		self.rotation = rotationMatrix(self.orientation)
+
+	def project(self, positions):
+		# (n, 3) simulated positions to view coordinates: x, y on screen and z as depth
+		return (positions - self.pivot) @ self.rotation.T + self.pivot
+
+	def perspective(self, positions):
+		# the eye sits distance in front of the pivot on the +z side;
+		# returns the screen points and the size scale of every vertex, 1 at the pivot depth
+		view = self.project(positions)
+		depth = numpy.maximum(self.distance - (view[:, 2] - self.pivot[2]), self.distance * self.NEAR)
+		scales = self.distance / depth
+		screen = (view[:, 0:2] - self.pivot[0:2]) * scales[:, None] + self.pivot[0:2]
+		return (screen, scales)
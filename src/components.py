@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import math, numpy
+from src.adjacency import Adjacency, connectedComponents
+from src.forceKernel import JITTER_SEEDS
+from src.layout import Layout, anneal
+from src.packing import packComponents, keepPinned
+from src.placement import PLACED_STABILITY, initialPositions
+
+# components at least this large are annealed in the executor's worker processes
+MIN_PARALLEL_COMPONENT = 256
+
+def splitComponents(adjacency, labels, count):
+	# the vertices of every component and its edges in local vertex indices
+	order = numpy.argsort(labels, kind="stable")
+	sizes = numpy.bincount(labels, minlength=count)
+	local = numpy.empty(len(labels), dtype=numpy.int32)
+	local[order] = numpy.arange(len(labels)) - numpy.repeat(numpy.cumsum(sizes) - sizes, sizes)
+	edges = adjacency.edgeList()
+	edgeLabels = labels[edges[:, 0]]
+	edgeOrder = numpy.argsort(edgeLabels, kind="stable")
+	edgeSizes = numpy.bincount(edgeLabels, minlength=count)
+	vertexGroups = numpy.split(order, numpy.cumsum(sizes)[:-1])
+	edgeGroups = numpy.split(local[edges[edgeOrder]], numpy.cumsum(edgeSizes)[:-1])
+	return list(zip(vertexGroups, edgeGroups))
+
+def componentSize(size, vertexCount, totalCount):
+	# every component gets a scene whose area is its share of the vertices
+	return size * math.sqrt(vertexCount / totalCount)
+
+def componentPlacement(placement, adjacency, size, dimension=2, rng=numpy.random):
+	# the initial placement of every component on its own, packed side by side;
+	# a connected graph gets exactly initialPositions
+	vertexCount = adjacency.numOfVertices()
+	(count, labels) = connectedComponents(adjacency)
+	if count <= 1:
+		return initialPositions(placement, adjacency, size * 5 / 8, size / 4, dimension, rng)
+	parts = []
+	for (vertices, edges) in splitComponents(adjacency, labels, count):
+		partSize = componentSize(size, len(vertices), vertexCount)
+		positions = initialPositions(placement, Adjacency(len(vertices), edges), partSize * 5 / 8, partSize / 4, dimension, rng)
+		parts.append((vertices, positions))
+	return packComponents(parts, vertexCount, size, dimension)
+
+def layoutComponent(task, pool=None):
+	# anneals one component in its own scene, in a worker process or in place
+	(vertexCount, edges, dimension, size, placement, iterations, tolerance, colors, barnesHut, theta, seed) = task
+	if vertexCount < 2:
+		return numpy.zeros((vertexCount, dimension))
+	rng = numpy.random.RandomState(seed)
+	layout = Layout(vertexCount, edges, dimension)
+	layout.colors = colors
+	layout.barnesHut = barnesHut
+	layout.theta = theta
+	layout.rng = rng
+	layout.pool = pool
+	layout.positions = initialPositions(placement, layout.currentAdjacency(), size * 5 / 8, size / 4, dimension, rng)
+	anneal(layout, size, iterations, tolerance, 1 if placement == "circle" else PLACED_STABILITY)
+	return layout.positions
+
+def componentLayout(layout, size=640, placement="circle", iterations=None, tolerance=None, executor=None):
+	# lays out every connected component independently and packs them into the scene;
+	# with an executor and more than one large component those are annealed in its processes,
+	# otherwise the layout's RepulsionPool serves the components annealed in place
+	adjacency = layout.currentAdjacency()
+	vertexCount = layout.numOfVertices()
+	fixed = ~layout.movable
+	original = layout.positions[fixed]
+	(count, labels) = connectedComponents(adjacency)
+	groups = splitComponents(adjacency, labels, count)
+	tasks = []
+	for (vertices, edges) in groups:
+		colors = None if layout.colors is None else layout.colors[vertices]
+		tasks.append((len(vertices), edges, layout.dimension, componentSize(size, len(vertices), vertexCount), placement,
+			iterations, tolerance, colors, layout.barnesHut, layout.theta, layout.rng.randint(JITTER_SEEDS)))
+	large = [index for (index, task) in enumerate(tasks) if task[0] >= MIN_PARALLEL_COMPONENT]
+	futures = {}
+	if executor is not None and len(large) > 1:
+		futures = {index: executor.submit(layoutComponent, tasks[index]) for index in large}
+	results = [None if index in futures else layoutComponent(task, layout.pool) for (index, task) in enumerate(tasks)]
+	for (index, future) in futures.items():
+		results[index] = future.result()
+	if count == 1:
+		layout.positions = results[0]
+	elif count > 1:
+		layout.positions = packComponents([(vertices, positions) for ((vertices, edges), positions) in zip(groups, results)], vertexCount, size, layout.dimension)
+	keepPinned(layout.positions, labels, count, fixed, original)
+	return count
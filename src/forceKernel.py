@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import numpy
+
+BLOCK_SIZE = 256
+# elements of the largest (rows, n, channels) temporary of one block, 32 MB of float64
+BLOCK_ELEMENTS = pow(2, 22)
+MIN_COLOR_DISTANCE = 1 / 256
+JITTER_SEEDS = pow(2, 31)
+
+def colorDistanceSquare(colors1, colors2):
+	diff = colors1[:, None, :] - colors2[None, :, :]
+	return numpy.einsum("ijk,ijk->ij", diff, diff) / pow(256, 2)
+
+def edgeColorScale(colors, first, second):
+	# per-edge factor of the ideal length, fixed as long as the colors and edges are
+	colorDiff = colors[first] - colors[second]
+	colorDistance = numpy.sqrt(numpy.einsum("ij,ij->i", colorDiff, colorDiff)) / 256
+	return numpy.maximum(colorDistance, MIN_COLOR_DISTANCE)
+
+def jitter(diff, rng):
+	lengthSquare = numpy.einsum("...k,...k->...", diff, diff)
+	near = lengthSquare < pow(0.1, 2)
+	count = numpy.count_nonzero(near)
+	if count:
+		diff[near, 0:2] = rng.random_sample((count, 2)) - 0.5
+	if diff.shape[-1] == 3:
+		flat = numpy.abs(diff[..., 2]) < 0.1
+		count = numpy.count_nonzero(flat)
+		if count:
+			diff[flat, 2] = rng.random_sample(count) - 0.5
+
+def blockSize(columnCount, dimension):
+	# BLOCK_SIZE rows, fewer once a block against every column would pass BLOCK_ELEMENTS;
+	# the color distances take three channels whatever the dimension
+	return max(1, min(BLOCK_SIZE, BLOCK_ELEMENTS // max(columnCount * max(dimension, 3), 1)))
+
+def blockCount(rowCount, size=BLOCK_SIZE):
+	return (rowCount + size - 1) // size
+
+def repulsiveBlocks(positions, kValue, colors, rows, seed, blocks, out):
+	# computes the given blocks of rows into out; every block jitters with its own generator,
+	# so splitting the blocks over processes gives exactly the serial result
+	kSquare = pow(kValue, 2)
+	size = blockSize(*positions.shape)
+	for blockIndex in blocks:
+		start = blockIndex * size
+		stop = min(start + size, len(rows))
+		block = rows[start:stop]
+		local = numpy.arange(stop - start)
+		diff = positions[block, None, :] - positions[None, :, :]
+		jitter(diff, numpy.random.RandomState((seed, blockIndex)))
+		lengthSquare = numpy.einsum("ijk,ijk->ij", diff, diff)
+		lengthSquare[local, block] = 1
+		weight = kSquare / lengthSquare
+		weight[local, block] = 0
+		if colors is not None:
+			weight *= colorDistanceSquare(colors[block], colors)
+		out[start:stop] = numpy.einsum("ij,ijk->ik", weight, diff)
+
+def repulsiveDisplacement(positions, kValue, colors=None, rng=None, rows=None):
+	# rows restricts the result to the forces acting on those vertices
+	if rng is None:
+		rng = numpy.random
+	if rows is None:
+		rows = numpy.arange(len(positions))
+	disp = numpy.zeros((len(rows), positions.shape[1]))
+	blocks = range(blockCount(len(rows), blockSize(*positions.shape)))
+	repulsiveBlocks(positions, kValue, colors, rows, rng.randint(JITTER_SEEDS), blocks, disp)
+	return disp
+
+def pairRepulsion(positions, kValue, pairs, colors=None, rng=None):
+	# the repulsion between the given vertex pairs only, each pair listed once and pushing both ends apart
+	if rng is None:
+		rng = numpy.random
+	(count, dimension) = positions.shape
+	disp = numpy.zeros_like(positions)
+	if len(pairs) == 0:
+		return disp
+	(first, second) = (pairs[:, 0], pairs[:, 1])
+	diff = positions[first] - positions[second]
+	jitter(diff, rng)
+	weight = pow(kValue, 2) / numpy.einsum("ij,ij->i", diff, diff)
+	if colors is not None:
+		colorDiff = colors[first] - colors[second]
+		weight *= numpy.einsum("ij,ij->i", colorDiff, colorDiff) / pow(256, 2)
+	push = diff * weight[:, None]
+	for axis in range(dimension):
+		disp[:, axis] += numpy.bincount(first, push[:, axis], count)
+		disp[:, axis] -= numpy.bincount(second, push[:, axis], count)
+	return disp
+
+def attractiveDisplacement(positions, first, second, kValue, colors=None, colorScale=None):
+	count, dimension = positions.shape
+	disp = numpy.zeros_like(positions)
+	if len(first) == 0:
+		return disp
+	diff = positions[first] - positions[second]
+	length = numpy.sqrt(numpy.einsum("ij,ij->i", diff, diff))
+	if colorScale is None and colors is not None:
+		colorScale = edgeColorScale(colors, first, second)
+	if colorScale is not None:
+		realK = kValue * colorScale
+	else:
+		realK = kValue
+	changeDisp = diff * (length / realK)[:, None]
+	for axis in range(dimension):
+		disp[:, axis] += numpy.bincount(second, changeDisp[:, axis], count)
+		disp[:, axis] -= numpy.bincount(first, changeDisp[:, axis], count)
+	return disp
+
+def limitedMove(positions, disp, temperature, movable=None):
+	length = numpy.sqrt(numpy.einsum("ij,ij->i", disp, disp))
+	scale = numpy.minimum(length, temperature) / numpy.where(length > 0, length, 1)
+	if movable is not None:
+		scale *= movable
+	positions += disp * scale[:, None]
+	return length * scale
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import hashlib, json, os, shutil, time, numpy
+from src.adjacency import Adjacency, adjacencyFromArrays
+from src.graphFile import GraphData, openGraph
+from src.layoutFile import LAYOUT_EXTENSION, saveLayout, loadLayout
+
+CACHE_DIRECTORY = os.environ.get("VISIBLEGRAPH_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "visibleGraph"))
+MAX_BYTES = 256 * 1024 * 1024
+ADJACENCY_ARRAYS = ("sources", "targets", "offsets", "neighbors", "edgeIds")
+
+def contentHash(path):
+	digest = hashlib.sha256()
+	with open(path, "rb") as file:
+		for block in iter(lambda: file.read(1 << 20), b""):
+			digest.update(block)
+	return digest.hexdigest()
+
+def directorySize(directory):
+	return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+class GraphCache(object):
+	# one directory per graph file content hash, evicted least recently used first
+	def __init__(self, directory=CACHE_DIRECTORY, maxBytes=MAX_BYTES):
+		self.directory = directory
+		self.maxBytes = maxBytes
+
+	def entry(self, key):
+		return os.path.join(self.directory, key)
+
+	def touch(self, key):
+		now = time.time()
+		os.utime(self.entry(key), (now, now))
+
+	def loadGraph(self, key):
+		entry = self.entry(key)
+		try:
+			with open(os.path.join(entry, "graph.json"), encoding="utf-8") as file:
+				info = json.load(file)
+			arrays = [numpy.load(os.path.join(entry, name + ".npy"), mmap_mode="r") for name in ADJACENCY_ARRAYS]
+		except (OSError, ValueError):
+			return None
+		self.touch(key)
+		return (info["vertexCount"], adjacencyFromArrays(*arrays), info["labels"])
+
+	def storeGraph(self, key, vertexCount, adjacency, labels):
+		entry = self.entry(key)
+		if labels is not None:
+			labels = [str(label) for label in labels]
+		try:
+			os.makedirs(entry, exist_ok=True)
+			for name in ADJACENCY_ARRAYS:
+				numpy.save(os.path.join(entry, name + ".npy"), getattr(adjacency, name))
+			with open(os.path.join(entry, "graph.json"), "w", encoding="utf-8") as file:
+				json.dump({"vertexCount": vertexCount, "labels": labels}, file)
+			self.evict(key)
+		except OSError:
+			shutil.rmtree(entry, ignore_errors=True)
+
+	def layoutPath(self, key, dimension):
+		return os.path.join(self.entry(key), "layout" + str(dimension) + "D" + LAYOUT_EXTENSION)
+
+	def loadLayout(self, key, dimension):
+		try:
+			layoutData = loadLayout(self.layoutPath(key, dimension))
+		except (OSError, ValueError, KeyError):
+			return None
+		self.touch(key)
+		return layoutData
+
+	def storeLayout(self, key, positions, fixed=None):
+		if not os.path.isdir(self.entry(key)):
+			return
+		try:
+			saveLayout(self.layoutPath(key, positions.shape[1]), positions, fixed, key)
+			self.touch(key)
+			self.evict(key)
+		except OSError:
+			pass
+
+	def open(self, path, dimension):
+		# returns the graph file's GraphData with its adjacency, cache key and last cached layout and fixed flags
+		key = contentHash(path)
+		cached = self.loadGraph(key)
+		if cached is None:
+			graphData = openGraph(path)
+			adjacency = Adjacency(graphData.vertexCount, graphData.edges)
+			self.storeGraph(key, graphData.vertexCount, adjacency, graphData.labels)
+			if graphData.positions is not None:
+				self.storeLayout(key, numpy.asarray(graphData.positions))
+		else:
+			(vertexCount, adjacency, labels) = cached
+			graphData = GraphData(vertexCount, adjacency.edgeList(), labels)
+		graphData.key = key
+		graphData.adjacency = adjacency
+		graphData.fixed = None
+		layoutData = self.loadLayout(key, dimension)
+		if layoutData is not None and layoutData.fits(graphData.vertexCount, dimension):
+			graphData.positions = layoutData.positions
+			graphData.fixed = layoutData.fixed
+		elif graphData.positions is not None and graphData.positions.shape[1] != dimension:
+			graphData.positions = None
+		return graphData
+
+	def evict(self, keep=None):
+		entries = []
+		for entry in os.scandir(self.directory):
+			if entry.is_dir():
+				entries.append((entry.stat().st_mtime, entry.name, directorySize(entry.path)))
+		total = sum(size for (mtime, name, size) in entries)
+		for (mtime, name, size) in sorted(entries):
+			if total <= self.maxBytes:
+				break
+			if name == keep:
+				continue
+			shutil.rmtree(self.entry(name), ignore_errors=True)
+			total -= size
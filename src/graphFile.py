@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import argparse, os, runpy, struct, sys, numpy
+
+# binary graph file (.vgb), little endian:
+#   header   magic, version, flags, dimension, vertexCount, edgeCount
+#   edges    int32[edgeCount][2]
+#   positions float64[vertexCount][dimension]         (flags & HAS_POSITIONS)
+#   labels   int64[vertexCount + 1] offsets, utf-8 bytes  (flags & HAS_LABELS)
+# every section starts on an 8 byte boundary so it can be viewed in place
+MAGIC = b"VGRAPH\0\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIIIIqq")
+HAS_POSITIONS = 1
+HAS_LABELS = 2
+BINARY_EXTENSION = ".vgb"
+
+class GraphData(object):
+	def __init__(self, vertexCount, edges, labels=None, positions=None):
+		self.vertexCount = vertexCount
+		self.edges = edges
+		self.labels = labels
+		self.positions = positions
+
+def graphName(path):
+	return os.path.splitext(os.path.basename(path))[0]
+
+def aligned(offset):
+	return (offset + 7) // 8 * 8
+
+def writeBinaryGraph(path, vertexCount, edges, labels=None, positions=None):
+	edges = numpy.ascontiguousarray(numpy.asarray(edges, dtype="<i4").reshape(-1, 2))
+	flags = 0
+	dimension = 0
+	if positions is not None:
+		positions = numpy.ascontiguousarray(numpy.asarray(positions, dtype="<f8"))
+		flags |= HAS_POSITIONS
+		dimension = positions.shape[1]
+	if labels is not None:
+		flags |= HAS_LABELS
+		encoded = [str(label).encode("utf-8") for label in labels]
+		offsets = numpy.zeros(vertexCount + 1, dtype="<i8")
+		numpy.cumsum([len(label) for label in encoded], out=offsets[1:])
+	with open(path, "wb") as file:
+		file.write(HEADER.pack(MAGIC, VERSION, flags, dimension, 0, vertexCount, len(edges)))
+		sections = [edges.tobytes()]
+		if positions is not None:
+			sections.append(positions.tobytes())
+		if labels is not None:
+			sections.append(offsets.tobytes())
+			sections.append(b"".join(encoded))
+		for section in sections:
+			file.write(b"\0" * (aligned(file.tell()) - file.tell()))
+			file.write(section)
+
+def checkSection(path, data, offset, size):
+	if offset + size > len(data):
+		raise ValueError(path + " is truncated")
+
+def readBinaryGraph(path):
+	if os.path.getsize(path) < HEADER.size:
+		raise ValueError(path + " is not a version " + str(VERSION) + " graph file")
+	data = numpy.memmap(path, dtype=numpy.uint8, mode="r")
+	(magic, version, flags, dimension, reserved, vertexCount, edgeCount) = HEADER.unpack(data[:HEADER.size].tobytes())
+	if magic != MAGIC or version != VERSION:
+		raise ValueError(path + " is not a version " + str(VERSION) + " graph file")
+	offset = aligned(HEADER.size)
+	checkSection(path, data, offset, edgeCount * 2 * 4)
+	edges = numpy.frombuffer(data, dtype="<i4", count=edgeCount * 2, offset=offset).reshape(-1, 2)
+	offset = aligned(offset + edges.nbytes)
+	positions = None
+	if flags & HAS_POSITIONS:
+		checkSection(path, data, offset, vertexCount * dimension * 8)
+		positions = numpy.frombuffer(data, dtype="<f8", count=vertexCount * dimension, offset=offset).reshape(-1, dimension)
+		offset = aligned(offset + positions.nbytes)
+	labels = None
+	if flags & HAS_LABELS:
+		checkSection(path, data, offset, (vertexCount + 1) * 8)
+		offsets = numpy.frombuffer(data, dtype="<i8", count=vertexCount + 1, offset=offset)
+		offset = aligned(offset + offsets.nbytes)
+		checkSection(path, data, offset, int(offsets[-1]))
+		blob = data[offset:offset + offsets[-1]].tobytes()
+		labels = [blob[start:stop].decode("utf-8") for (start, stop) in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+	return GraphData(vertexCount, edges, labels, positions)
+
+def readModuleGraph(path):
+	data = runpy.run_path(path)
+	return GraphData(data["vertexCount"], data["edges"], data.get("labels"))
+
+def openGraph(path):
+	if path.endswith(BINARY_EXTENSION):
+		return readBinaryGraph(path)
+	return readModuleGraph(path)
+
+def loadGraph(path):
+	graph = openGraph(path)
+	return (graph.vertexCount, graph.edges, graph.labels)
+
+def catalog(directory="./graphData"):
+	paths = []
+	for fileName in sorted(os.listdir(directory)):
+		if fileName == "__init__.py":
+			continue
+		if fileName.endswith(".py") or fileName.endswith(BINARY_EXTENSION):
+			paths.append(os.path.join(directory, fileName))
+	return paths
+
+def catalogName(path):
+	if path.endswith(BINARY_EXTENSION):
+		return os.path.basename(path)
+	return graphName(path)
+
+def convert(path, outputPath):
+	graph = readModuleGraph(path)
+	writeBinaryGraph(outputPath, graph.vertexCount, graph.edges, graph.labels)
+
+def main(argv):
+	parser = argparse.ArgumentParser(description="convert graphData modules into binary graph files")
+	parser.add_argument("paths", nargs="*", help="graph modules (default: every module in ./graphData)")
+	parser.add_argument("-o", "--output", default="./graphData", help="output directory")
+	arguments = parser.parse_args(argv)
+	paths = arguments.paths or [path for path in catalog() if path.endswith(".py")]
+	os.makedirs(arguments.output, exist_ok=True)
+	for path in paths:
+		outputPath = os.path.join(arguments.output, graphName(path) + BINARY_EXTENSION)
+		convert(path, outputPath)
+		print(path + " -> " + outputPath)
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv[1:]))
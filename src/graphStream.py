@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import queue, threading, numpy
+from src.layout import placeVertices
+
+# graph event stream, one event per line, vertices are named by any token without spaces:
+#   +v name        insert a vertex
+#   -v name        delete a vertex and its edges
+#   +e name name   insert an edge, inserting missing endpoints
+#   -e name name   delete one edge between the two vertices
+# blank lines and lines starting with "#" are skipped
+EVENT_ARITY = {"+v": 1, "-v": 1, "+e": 2, "-e": 2}
+REHEAT_STABILITY = 16
+MAX_EVENTS = 4096
+
+def parseEvent(line):
+	fields = line.split()
+	if not fields or fields[0].startswith("#"):
+		return None
+	if EVENT_ARITY.get(fields[0]) != len(fields) - 1:
+		raise ValueError("bad graph event: " + line.strip())
+	return tuple(fields)
+
+class EventReader(threading.Thread):
+	# reads events from a file or named pipe into a queue so the GUI never blocks on input
+	def __init__(self, path):
+		super().__init__(daemon=True)
+		self.path = path
+		self.events = queue.Queue()
+		self.error = None
+
+	def run(self):
+		try:
+			with open(self.path, encoding="utf-8") as file:
+				for line in file:
+					try:
+						event = parseEvent(line)
+					except ValueError as error:
+						self.error = error
+						continue
+					if event is not None:
+						self.events.put(event)
+		except OSError as error:
+			self.error = error
+
+	def drain(self, limit=MAX_EVENTS):
+		events = []
+		try:
+			while len(events) < limit:
+				events.append(self.events.get_nowait())
+		except queue.Empty:
+			pass
+		return events
+
+class GraphStream(object):
+	# maps the stream's vertex names to layout indices and turns a batch of events into one graph change
+	def __init__(self, vertexCount):
+		self.names = [str(index) for index in range(vertexCount)]
+		self.indexOf = {name: index for (index, name) in enumerate(self.names)}
+
+	def apply(self, layout, events, center, spread, temperature, target=None, rng=numpy.random):
+		# target is the layout itself or an object wrapping it with the same changeGraph;
+		# returns the indices of the vertices the batch touched, which are reheated
+		if target is None:
+			target = layout
+		vertexCount = layout.numOfVertices()
+		adjacency = layout.currentAdjacency()
+		newNames = []
+		edges = []
+		removedEdges = set()
+		removedVertices = set()
+		touched = []
+
+		def vertex(name):
+			if name not in self.indexOf:
+				self.indexOf[name] = vertexCount + len(newNames)
+				newNames.append(name)
+			return self.indexOf[name]
+
+		for event in events:
+			if event[0] == "+v":
+				touched.append(vertex(event[1]))
+			elif event[0] == "+e":
+				edge = (vertex(event[1]), vertex(event[2]))
+				edges.append(edge)
+				touched.extend(edge)
+			elif event[0] == "-v" and event[1] in self.indexOf:
+				index = self.indexOf.pop(event[1])
+				removedVertices.add(index)
+				if index < vertexCount:
+					touched.extend(adjacency.neighborsOf(index).tolist())
+				touched.extend(other for edge in edges if index in edge for other in edge)
+			elif event[0] == "-e" and event[1] in self.indexOf and event[2] in self.indexOf:
+				edge = self.findEdge(adjacency, edges, removedEdges, self.indexOf[event[1]], self.indexOf[event[2]])
+				if edge is None:
+					continue
+				if edge < 0:
+					del edges[-edge - 1]
+				else:
+					removedEdges.add(edge)
+				touched.extend((self.indexOf[event[1]], self.indexOf[event[2]]))
+		positions = numpy.concatenate((layout.positions, numpy.zeros((len(newNames), layout.dimension))))
+		placeVertices(positions, numpy.arange(vertexCount, len(positions)), edges, center, spread, rng)
+		(remap, keepEdge) = target.changeGraph(positions[vertexCount:], edges, sorted(removedEdges), sorted(removedVertices))
+		self.names = [name for (name, index) in zip(self.names + newNames, remap.tolist()) if index >= 0]
+		self.indexOf = {name: index for (index, name) in enumerate(self.names)}
+		touched = remap[numpy.asarray(touched, dtype=numpy.intp)]
+		touched = touched[touched >= 0]
+		if len(touched):
+			layout.reheat(touched, temperature)
+		return touched
+
+	def findEdge(self, adjacency, edges, removedEdges, first, second):
+		# an edge inserted earlier in the batch is returned as -(position + 1), an existing one as its edge id
+		for position in range(len(edges) - 1, -1, -1):
+			if edges[position] in ((first, second), (second, first)):
+				return -position - 1
+		if first >= adjacency.numOfVertices():
+			return None
+		candidates = adjacency.incidentEdges(first)[adjacency.neighborsOf(first) == second]
+		for edge in candidates.tolist():
+			if edge not in removedEdges:
+				return edge
+		return None
@@ -0,0 +1,354 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import math, numpy
+from src.forceKernel import repulsiveDisplacement, pairRepulsion, attractiveDisplacement, limitedMove, edgeColorScale
+from src.spaceTree import barnesHutDisplacement
+from src.adjacency import Adjacency, connectedComponents
+from src.packing import packComponents, keepPinned
+from src.profiler import PROFILER
+
+WARM_STABILITY = 64
+REHEAT_HOPS = 2
+HEAT_COOLING = 0.9
+MIN_HEAT = 0.5
+# components below this size are repelled all at once through their vertex pairs
+SMALL_COMPONENT = 64
+
+class ComponentGroups(object):
+	# the connected components of a disconnected graph, labeled by decreasing size as connectedComponents does
+	def __init__(self, labels, count):
+		self.labels = labels
+		self.count = count
+		self.sizes = numpy.bincount(labels, minlength=count)
+		order = numpy.argsort(labels, kind="stable")
+		starts = numpy.concatenate(([0], numpy.cumsum(self.sizes)))
+		self.members = numpy.split(order, starts[1:-1])
+		self.large = [members for members in self.members if len(members) >= SMALL_COMPONENT]
+		# components of one size are adjacent in order, so each size is a (components, size) block
+		pairs = [numpy.zeros((0, 2), dtype=numpy.intp)]
+		for size in numpy.unique(self.sizes[(self.sizes > 1) & (self.sizes < SMALL_COMPONENT)]).tolist():
+			sameSize = numpy.nonzero(self.sizes == size)[0]
+			block = order[starts[sameSize[0]]:starts[sameSize[-1] + 1]].reshape(-1, size)
+			(first, second) = numpy.triu_indices(size, 1)
+			pairs.append(numpy.stack((block[:, first].reshape(-1), block[:, second].reshape(-1)), axis=1))
+		self.pairs = numpy.concatenate(pairs)
+
+	def centroids(self, positions):
+		sums = numpy.stack([numpy.bincount(self.labels, positions[:, axis], self.count) for axis in range(positions.shape[1])], axis=1)
+		return sums / self.sizes[:, None]
+
+	def anchor(self, positions, centroids, movable):
+		# shifts every component back onto its centroid, except those holding a vertex that may not move
+		shift = centroids - self.centroids(positions)
+		shift[numpy.bincount(self.labels[~movable], minlength=self.count) > 0] = 0
+		positions += shift[self.labels]
+
+class Layout(object):
+	def __init__(self, vertexCount, edges=(), dimension=2):
+		self.dimension = dimension
+		self.positions = numpy.zeros((vertexCount, dimension))
+		self.disp = numpy.zeros((vertexCount, dimension))
+		self.movable = numpy.ones(vertexCount, dtype=bool)
+		# pinned vertices; movable also leaves out the ones being dragged
+		self.fixed = numpy.zeros(vertexCount, dtype=bool)
+		self.adjacency = Adjacency(vertexCount, edges)
+		self.pendingEdges = []
+		self.colors = None
+		self.colorScaleKey = (None, None)
+		self.colorScale = None
+		self.heat = None
+		self.rng = numpy.random
+		self.energy = 0
+		self.barnesHut = False
+		self.theta = 0.8
+		# a RepulsionPool shares the exact repulsion over processes
+		self.pool = None
+		self.components = None
+		self.componentKey = None
+
+	def addEdge(self, vertex1Index, vertex2Index):
+		self.pendingEdges.append((vertex1Index, vertex2Index))
+
+	def addEdges(self, edges):
+		self.adjacency = self.currentAdjacency().withEdges(edges, self.numOfVertices())
+
+	def currentAdjacency(self):
+		if self.pendingEdges:
+			self.adjacency = self.adjacency.withEdges(self.pendingEdges, self.numOfVertices())
+			self.pendingEdges = []
+		return self.adjacency
+
+	def numOfVertices(self):
+		return len(self.positions)
+
+	def numOfEdges(self):
+		return self.adjacency.numOfEdges() + len(self.pendingEdges)
+
+	def kValue(self, area):
+		edgeVertexRate = self.numOfEdges() / self.numOfVertices()
+		return math.sqrt(area / self.numOfVertices() / 40) * edgeVertexRate
+
+	def edgeColorScale(self):
+		# recomputed only when the colors array or the edges are replaced
+		adjacency = self.currentAdjacency()
+		if self.colors is None:
+			return None
+		if self.colorScaleKey[0] is not self.colors or self.colorScaleKey[1] is not adjacency:
+			self.colorScale = edgeColorScale(self.colors, adjacency.sources, adjacency.targets)
+			self.colorScaleKey = (self.colors, adjacency)
+		return self.colorScale
+
+	def componentGroups(self):
+		# found again only when the edges are replaced; None for a connected graph
+		adjacency = self.currentAdjacency()
+		if self.componentKey is not adjacency:
+			(count, labels) = connectedComponents(adjacency)
+			self.components = ComponentGroups(labels, count) if count > 1 else None
+			self.componentKey = adjacency
+		return self.components
+
+	def repulsion(self, positions, kValue, colors, rows=None):
+		if self.barnesHut:
+			return barnesHutDisplacement(positions, kValue, self.theta, self.rng, colors, rows)
+		if self.pool is not None and rows is None:
+			return self.pool.repulsiveDisplacement(positions, kValue, colors, self.rng)
+		return repulsiveDisplacement(positions, kValue, colors, self.rng, rows)
+
+	def repulsiveForces(self, kValue):
+		components = self.componentGroups()
+		if components is None:
+			self.disp += self.repulsion(self.positions, kValue, self.colors)
+			return
+		# vertices of different components do not repel each other
+		self.disp += pairRepulsion(self.positions, kValue, components.pairs, self.colors, self.rng)
+		for members in components.large:
+			colors = None if self.colors is None else self.colors[members]
+			self.disp[members] += self.repulsion(self.positions[members], kValue, colors)
+
+	def repulsiveRows(self, kValue, rows):
+		components = self.componentGroups()
+		if components is None:
+			return self.repulsion(self.positions, kValue, self.colors, rows)
+		disp = numpy.zeros((len(rows), self.dimension))
+		labels = components.labels[rows]
+		for label in numpy.unique(labels).tolist():
+			members = components.members[label]
+			inside = numpy.nonzero(labels == label)[0]
+			colors = None if self.colors is None else self.colors[members]
+			disp[inside] = self.repulsion(self.positions[members], kValue, colors, numpy.searchsorted(members, rows[inside]))
+		return disp
+
+	def attractiveForces(self, kValue):
+		adjacency = self.currentAdjacency()
+		self.disp += attractiveDisplacement(self.positions, adjacency.sources, adjacency.targets, kValue, colorScale=self.edgeColorScale())
+
+	def centering(self, center):
+		self.disp += numpy.asarray(center) - self.positions.mean(axis=0)
+
+	def displacement(self, kValue, center=None):
+		self.disp = numpy.zeros_like(self.positions)
+		with PROFILER.phase("repulsiveForces"):
+			self.repulsiveForces(kValue)
+		with PROFILER.phase("attractiveForces"):
+			self.attractiveForces(kValue)
+		if center is not None:
+			self.centering(center)
+
+	def move(self, temperature, area, center=None, bounds=None):
+		self.displacement(self.kValue(area), center)
+		if self.heat is not None:
+			temperature = numpy.maximum(temperature, self.heat)
+			self.coolDown()
+		components = self.componentGroups()
+		with PROFILER.phase("limitedMove"):
+			if components is not None:
+				centroids = components.centroids(self.positions)
+			step = limitedMove(self.positions, self.disp, temperature, self.movable)
+			self.energy = numpy.einsum("ij,ij->", self.disp[self.movable], self.disp[self.movable])
+			if components is not None:
+				# without forces between them the components keep their packed places
+				components.anchor(self.positions, centroids, self.movable)
+			if bounds is not None:
+				numpy.clip(self.positions, bounds[0], bounds[1], out=self.positions)
+		return step.max(initial=0)
+
+	def reheat(self, vertices, temperature, hops=REHEAT_HOPS):
+		# raises the temperature of the vertices and, halving per hop, of their neighborhood
+		if self.heat is None:
+			self.heat = numpy.zeros(self.numOfVertices())
+		adjacency = self.currentAdjacency()
+		region = numpy.unique(numpy.asarray(vertices, dtype=numpy.intp))
+		for hop in range(hops + 1):
+			self.heat[region] = numpy.maximum(self.heat[region], temperature * pow(0.5, hop))
+			if hop == hops or len(region) == 0:
+				break
+			starts = adjacency.offsets[region]
+			counts = adjacency.offsets[region + 1] - starts
+			slots = numpy.repeat(starts - numpy.cumsum(counts) + counts, counts) + numpy.arange(counts.sum())
+			region = numpy.unique(adjacency.neighbors[slots])
+
+	def coolDown(self):
+		self.heat = self.heat * HEAT_COOLING
+		self.heat[self.heat < MIN_HEAT] = 0
+		if not numpy.any(self.heat):
+			self.heat = None
+
+	def localMove(self, area, bounds=None):
+		# moves only the vertices left hot by reheat, each at its own temperature
+		if self.heat is None:
+			return 0
+		hot = numpy.nonzero((self.heat > 0) & self.movable)[0]
+		if len(hot) == 0:
+			self.heat = None
+			return 0
+		kValue = self.kValue(area)
+		with PROFILER.phase("repulsiveForces"):
+			disp = self.repulsiveRows(kValue, hot)
+		adjacency = self.currentAdjacency()
+		hotMask = numpy.zeros(self.numOfVertices(), dtype=bool)
+		hotMask[hot] = True
+		incident = hotMask[adjacency.sources] | hotMask[adjacency.targets]
+		colorScale = self.edgeColorScale()
+		if colorScale is not None:
+			colorScale = colorScale[incident]
+		with PROFILER.phase("attractiveForces"):
+			disp += attractiveDisplacement(self.positions, adjacency.sources[incident], adjacency.targets[incident], kValue, colorScale=colorScale)[hot]
+		moved = self.positions[hot]
+		step = limitedMove(moved, disp, self.heat[hot])
+		if bounds is not None:
+			numpy.clip(moved, bounds[0], bounds[1], out=moved)
+		self.positions[hot] = moved
+		self.energy = numpy.einsum("ij,ij->", disp, disp)
+		self.coolDown()
+		return step.max(initial=0)
+
+	def changeGraph(self, positions=(), edges=(), removedEdges=(), removedVertices=()):
+		# appends vertices and edges, then drops edge ids and vertex indices; returns the old to new index map
+		positions = numpy.asarray(positions, dtype=float).reshape(-1, self.dimension)
+		edgeList = numpy.concatenate((self.currentAdjacency().edgeList(), numpy.asarray(edges, dtype=numpy.int32).reshape(-1, 2)))
+		count = self.numOfVertices() + len(positions)
+		keepVertex = numpy.ones(count, dtype=bool)
+		keepVertex[numpy.asarray(removedVertices, dtype=numpy.intp)] = False
+		keepEdge = numpy.ones(len(edgeList), dtype=bool)
+		keepEdge[numpy.asarray(removedEdges, dtype=numpy.intp)] = False
+		keepEdge &= keepVertex[edgeList[:, 0]] & keepVertex[edgeList[:, 1]]
+		remap = numpy.full(count, -1, dtype=numpy.intp)
+		remap[keepVertex] = numpy.arange(numpy.count_nonzero(keepVertex))
+		self.positions = numpy.concatenate((self.positions, positions))[keepVertex]
+		self.disp = numpy.zeros_like(self.positions)
+		self.movable = numpy.concatenate((self.movable, numpy.ones(len(positions), dtype=bool)))[keepVertex]
+		self.fixed = numpy.concatenate((self.fixed, numpy.zeros(len(positions), dtype=bool)))[keepVertex]
+		if self.colors is not None:
+			self.colors = numpy.concatenate((self.colors, self.rng.random_sample((len(positions), 3)) * 256))[keepVertex]
+		if self.heat is not None:
+			self.heat = numpy.concatenate((self.heat, numpy.zeros(len(positions))))[keepVertex]
+		self.adjacency = Adjacency(len(self.positions), remap[edgeList[keepEdge]])
+		return (remap, keepEdge)
+
+	def repackComponents(self, size):
+		# packs the components side by side again in their current shapes, which they change while settling;
+		# returns the component count
+		components = self.componentGroups()
+		if components is None:
+			return 1 if self.numOfVertices() else 0
+		fixed = ~self.movable
+		original = self.positions[fixed]
+		parts = [(members, self.positions[members]) for members in components.members]
+		self.positions = packComponents(parts, self.numOfVertices(), size, self.dimension)
+		keepPinned(self.positions, components.labels, components.count, fixed, original)
+		return components.count
+
+	def radius(self, center):
+		diff = self.positions - numpy.asarray(center)
+		return numpy.sqrt(numpy.einsum("ij,ij->i", diff, diff)).max(initial=0)
+
+	def autosize(self, area, center, size, temperature):
+		if self.radius(center) < size * 11 / 24:
+			return area * (1 + temperature / size)
+		else:
+			return area * (1 - temperature / size)
+
+class AdaptiveCooling(object):
+	# step length scale that shrinks when the energy rises and grows back after steady progress
+	def __init__(self, ratio=0.9, patience=5, minScale=0.25):
+		self.ratio = ratio
+		self.patience = patience
+		self.minScale = minScale
+		self.reset()
+
+	def reset(self):
+		self.energy = math.inf
+		self.progress = 0
+		self.scale = 1.0
+
+	def update(self, energy):
+		if energy < self.energy:
+			self.progress += 1
+			if self.progress >= self.patience:
+				self.progress = 0
+				self.scale = min(1.0, self.scale / self.ratio)
+		else:
+			self.progress = 0
+			self.scale = max(self.minScale, self.scale * self.ratio)
+		self.energy = energy
+		return self.scale
+
+def circlePositions(vertexCount, center, radius, dimension=2):
+	angles = numpy.arange(vertexCount) / vertexCount * (2 * math.pi)
+	positions = numpy.zeros((vertexCount, dimension))
+	positions[:, 0] = center + radius * numpy.cos(angles)
+	positions[:, 1] = center + radius * numpy.sin(angles)
+	return positions
+
+def placeVertices(positions, vertices, edges, center, spread, rng=numpy.random):
+	# puts new vertices at the mean of their already placed neighbors, or near the center without any
+	(count, dimension) = positions.shape
+	vertices = numpy.asarray(vertices, dtype=numpy.intp)
+	edges = numpy.asarray(edges, dtype=numpy.intp).reshape(-1, 2)
+	placed = numpy.ones(count, dtype=bool)
+	placed[vertices] = False
+	ends = numpy.concatenate((edges[:, 0], edges[:, 1]))
+	others = numpy.concatenate((edges[:, 1], edges[:, 0]))
+	for placeRound in range(len(vertices)):
+		known = placed[others] & ~placed[ends]
+		if not numpy.any(known):
+			break
+		counts = numpy.bincount(ends[known], minlength=count)
+		sums = numpy.stack([numpy.bincount(ends[known], positions[others[known], axis], count) for axis in range(dimension)], axis=1)
+		ready = numpy.nonzero(counts)[0]
+		positions[ready] = sums[ready] / counts[ready, None] + (rng.random_sample((len(ready), dimension)) - 0.5) * spread
+		placed[ready] = True
+	isolated = vertices[~placed[vertices]]
+	positions[isolated] = numpy.asarray(center) + (rng.random_sample((len(isolated), dimension)) - 0.5) * spread * 4
+
+def sceneBounds(size, dimension=2):
+	return (numpy.full(dimension, size / 8), numpy.full(dimension, size / 8 + size))
+
+def anneal(layout, size=640, iterations=None, tolerance=None, firstStability=1):
+	# mirrors MainWindow / MainWindow3D: the scene is size x size with a margin of size / 8
+	if iterations is None:
+		iterations = int(size)
+	area = size * size
+	bounds = sceneBounds(size, layout.dimension)
+	center = None
+	if layout.dimension == 3:
+		center = numpy.full(3, size * 5 / 8)
+	for stability in range(firstStability, firstStability + iterations):
+		step = layout.move(size / stability, area, center, bounds)
+		if layout.dimension == 3:
+			area = layout.autosize(area, center, size, size / (stability + 1))
+		if tolerance is not None and step < tolerance:
+			iterations = stability - firstStability + 1
+			break
+	layout.repackComponents(size)
+	return iterations
+
+def runLayout(vertexCount, edges, dimension=2, size=640, iterations=None, tolerance=None, barnesHut=False, theta=0.8):
+	layout = Layout(vertexCount, edges, dimension)
+	layout.barnesHut = barnesHut
+	layout.theta = theta
+	if vertexCount > 0:
+		layout.positions = circlePositions(vertexCount, size * 5 / 8, size / 4, dimension)
+		anneal(layout, size, iterations, tolerance)
+	return layout.positions
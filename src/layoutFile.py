@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import numpy
+
+# layout file (.vgl): numpy npz archive of
+#   positions float64[vertexCount][dimension]
+#   fixed     bool[vertexCount]
+#   key       content hash of the graph file the layout belongs to ("" if unknown)
+LAYOUT_EXTENSION = ".vgl"
+
+class LayoutData(object):
+	def __init__(self, positions, fixed=None, key=None):
+		self.positions = positions
+		if fixed is None:
+			fixed = numpy.zeros(len(positions), dtype=bool)
+		self.fixed = fixed
+		self.key = key
+
+	def numOfVertices(self):
+		return len(self.positions)
+
+	def dimension(self):
+		return self.positions.shape[1]
+
+	def fits(self, vertexCount, dimension):
+		return self.numOfVertices() == vertexCount and self.dimension() == dimension
+
+def saveLayout(path, positions, fixed=None, key=None):
+	positions = numpy.asarray(positions, dtype=float)
+	if fixed is None:
+		fixed = numpy.zeros(len(positions), dtype=bool)
+	# a file object keeps numpy from appending ".npz" to the path
+	with open(path, "wb") as file:
+		numpy.savez(file, positions=positions, fixed=numpy.asarray(fixed, dtype=bool), key=numpy.array(key or ""))
+
+def loadLayout(path):
+	with numpy.load(path) as data:
+		positions = data["positions"]
+		fixed = data["fixed"]
+		key = str(data["key"]) or None
+	if len(fixed) != len(positions):
+		raise ValueError(path + " has " + str(len(fixed)) + " fixed flags for " + str(len(positions)) + " vertices")
+	return LayoutData(positions, fixed, key)
@@ -2,32 +2,123 @@
 # coding: utf-8
 
 from PyQt5.QtWidgets import QApplication, QWidget, qApp, QPushButton
-from PyQt5.QtWidgets import QGraphicsScene, QStyleOptionGraphicsItem, QComboBox
+from PyQt5.QtWidgets import QGraphicsScene, QComboBox
 from PyQt5.QtWidgets import QGraphicsView, QHBoxLayout, QVBoxLayout, QGraphicsLineItem
-from PyQt5.QtWidgets import QGraphicsEllipseItem, QDesktopWidget, QGraphicsItem
-from PyQt5.QtCore import Qt, QPoint, QRectF, QLineF, QPointF
-from PyQt5.QtGui import QVector2D, QPainter, QPen, QBrush, QColor
-import sys, math, random, glob, os
+from PyQt5.QtWidgets import QGraphicsEllipseItem, QDesktopWidget, QGraphicsItem, QDoubleSpinBox, QSpinBox
+from PyQt5.QtWidgets import QFileDialog, QMessageBox
+from PyQt5.QtCore import Qt, QPoint, QRectF, QLineF, QPointF, QTimer
+from PyQt5.QtGui import QVector2D, QPen, QBrush, QColor
+import sys, math, random, os, numpy
+from src.layout import Layout, WARM_STABILITY, AdaptiveCooling
+from src.placement import PLACED_STABILITY
+from src.components import componentPlacement, componentLayout
+from src.graphFile import catalog, catalogName
+from src.graphCache import GraphCache
+from src.layoutFile import LAYOUT_EXTENSION, saveLayout, loadLayout
+from src.renderer import GraphItem, SelectionBand, paintHud
+from src.simulationWorker import SimulationWorker
+from src.multilevel import multilevelLayout, REFINE_STABILITY
+from src.graphStream import EventReader, GraphStream, REHEAT_STABILITY
+from src.profiler import PROFILER
+from src.parallelRepulsion import RepulsionPool
+
+CONVERGED_STEP = 0.1
+STILL_TICKS = 20
+FRAME_INTERVAL = 16
+THROTTLE_STEP = 0.5
+THROTTLED_INTERVAL = 16
+STREAM_INTERVAL = 50
+HUD_PHASES = 6
+PLACEMENT_NAMES = (("Circle", "circle"), ("Pivot MDS", "pivotMds"), ("Spectral", "spectral"))
+
+class GraphView(QGraphicsView):
+	ZOOM_STEP = 1.25
+
+	def __init__(self, scene, parent):
+		super().__init__(scene, parent)
+		self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+		self.panPoint = None
+		self.hudLines = None
+		self.graphItem = None
+		self.band = None
+		self.viewport().setMouseTracking(True)
+
+	def setGraphItem(self, graphItem):
+		self.graphItem = graphItem
+		self.band = SelectionBand(self, graphItem)
+
+	def paintEvent(self, event):
+		with PROFILER.phase("paint"):
+			super().paintEvent(event)
+
+	def drawForeground(self, painter, rect):
+		if self.graphItem is not None:
+			self.graphItem.paintOverlay(painter)
+		if PROFILER.enabled and self.hudLines is not None:
+			paintHud(painter, self.hudLines())
+
+	def wheelEvent(self, event):
+		if event.angleDelta().y() > 0:
+			self.scale(self.ZOOM_STEP, self.ZOOM_STEP)
+		elif event.angleDelta().y() < 0:
+			self.scale(1 / self.ZOOM_STEP, 1 / self.ZOOM_STEP)
+
+	def mousePressEvent(self, event):
+		if event.button() in (Qt.RightButton, Qt.MiddleButton):
+			self.panPoint = event.pos()
+			self.setCursor(Qt.ClosedHandCursor)
+		elif event.button() == Qt.LeftButton and self.graphItem.pick(self.mapToScene(event.pos())) is None:
+			# a left drag on empty space selects vertices, with Ctrl added to the selection
+			self.band.start(event.pos())
+		else:
+			super().mousePressEvent(event)
+
+	def mouseMoveEvent(self, event):
+		if self.band.isActive():
+			self.band.drag(event.pos())
+			return
+		if self.panPoint is None:
+			super().mouseMoveEvent(event)
+			if event.buttons() == Qt.NoButton and self.graphItem.hover(self.mapToScene(event.pos())):
+				self.viewport().update()
+			return
+		disp = event.pos() - self.panPoint
+		self.panPoint = event.pos()
+		self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() - disp.x())
+		self.verticalScrollBar().setValue(self.verticalScrollBar().value() - disp.y())
+
+	def mouseReleaseEvent(self, event):
+		if self.panPoint is not None and event.button() in (Qt.RightButton, Qt.MiddleButton):
+			self.panPoint = None
+			self.unsetCursor()
+		elif self.band.isActive() and event.button() == Qt.LeftButton:
+			self.band.finish(event.pos(), bool(event.modifiers() & Qt.ControlModifier))
+		else:
+			super().mouseReleaseEvent(event)
 
 class Vertex(QVector2D):
 	def __init__(self, x, y):
 		super().__init__(x, y)
 		self.disp = QVector2D(0, 0)
-		self.edges = []
+		self.index = None
+		self.graph = None
 		self.circle = VertexCircle(self)
 		self.fixSign = VertexFixSign(self)
 		self.nowClicked = False
 
-	def addEdge(self, edge):
-		self.edges.append(edge)
+	def incidentEdges(self):
+		return self.graph.incidentEdges(self.index)
 
 	def isFixed(self):
-		return self.fixSign.isVisible()
+		return bool(self.graph.layout.fixed[self.index])
 
 	def fix(self):
+		self.graph.layout.fixed[self.index] = True
+		self.fixSign.move()
 		self.fixSign.setVisible(True)
 
 	def release(self):
+		self.graph.layout.fixed[self.index] = False
 		self.fixSign.setVisible(False)
 
 	def distanceInColor(self, other):
@@ -46,7 +137,7 @@ class VertexCircle(QGraphicsEllipseItem):
 		rect = QRectF(vertex.x() - self.RADIUS, vertex.y() - self.RADIUS, self.RADIUS * 2, self.RADIUS * 2)
 		super().__init__(rect)
 		self.vertex = vertex
-		self.color = QColor(random.random() * 256, random.random() * 256, random.random() * 256)
+		self.color = QColor(random.randrange(256), random.randrange(256), random.randrange(256))
 		self.pen = QPen(Qt.black)
 		self.brush = QBrush(self.color, Qt.SolidPattern)
 		self.setPen(self.pen)
@@ -58,6 +149,8 @@ class VertexCircle(QGraphicsEllipseItem):
 		self.clickPoint = self.rect().topLeft()
 		scene.stability = min(16, scene.stability)
 		self.vertex.nowClicked = True
+		scene.vertexChanged(self.vertex)
+		scene.rearm()
 
 	def mouseMoveEvent(self, event):
 		disp = event.lastScenePos() - event.buttonDownScenePos(Qt.LeftButton)
@@ -65,8 +158,9 @@ class VertexCircle(QGraphicsEllipseItem):
 		self.vertex.setY(self.clickPoint.y() + disp.y() + self.RADIUS)
 		self.move()
 		self.vertex.fixSign.move()
-		for edge in self.vertex.edges:
+		for edge in self.vertex.incidentEdges():
 			edge.move()
+		self.scene().vertexChanged(self.vertex)
 
 	def mouseReleaseEvent(self, event):
 		if self.doubleClicked:
@@ -74,12 +168,16 @@ class VertexCircle(QGraphicsEllipseItem):
 		else:
 			self.vertex.fix()
 		self.vertex.nowClicked = False
+		self.scene().vertexChanged(self.vertex)
+		self.scene().rearm()
 
 	def mouseDoubleClickEvent(self, event):
 		scene = self.scene()
 		self.vertex.release()
 		self.doubleClicked = True
 		scene.stability = min(16, scene.stability)
+		scene.vertexChanged(self.vertex)
+		scene.rearm()
 
 	def move(self):
 		self.setRect(QRectF(self.vertex.x() - self.RADIUS, self.vertex.y() - self.RADIUS, self.RADIUS * 2, self.RADIUS * 2))
@@ -127,15 +225,34 @@ class Graph(object):
 	def __init__(self, *vertices):
 		self.vertices = list(vertices)
 		self.edges = []
+		for (index, vertex) in enumerate(self.vertices):
+			vertex.index = index
+			vertex.graph = self
+		self.layout = Layout(len(self.vertices))
 		self.colored = False
+		self.updateColors()
+		self.readPositions()
 
 	def addEdge(self, vertex1Index, vertex2Index):
 		vertex1 = self.vertices[vertex1Index]
 		vertex2 = self.vertices[vertex2Index]
 		edge = Edge(vertex1, vertex2)
 		self.edges.append(edge)
-		vertex1.addEdge(edge)
-		vertex2.addEdge(edge)
+		self.layout.addEdge(vertex1Index, vertex2Index)
+
+	def addEdges(self, edges, adjacency=None):
+		for (vertex1Index, vertex2Index) in numpy.asarray(edges).reshape(-1, 2).tolist():
+			self.edges.append(Edge(self.vertices[vertex1Index], self.vertices[vertex2Index]))
+		if adjacency is None:
+			self.layout.addEdges(edges)
+		else:
+			self.layout.adjacency = adjacency
+
+	def incidentEdges(self, vertexIndex):
+		return [self.edges[edgeIndex] for edgeIndex in self.layout.currentAdjacency().incidentEdges(vertexIndex)]
+
+	def degree(self, vertexIndex):
+		return self.layout.currentAdjacency().degree(vertexIndex)
 
 	def numOfVertices(self):
 		return len(self.vertices)
@@ -143,7 +260,43 @@ class Graph(object):
 	def numOfEdges(self):
 		return len(self.edges)
 
-	def repulsiveForces(self, kValue):
+	def updateColors(self):
+		# colors are set once per VertexCircle, so the vectors are only rebuilt when a color is changed
+		self.colorVectors = numpy.array([vertex.circle.color.getRgb()[:3] for vertex in self.vertices], dtype=float).reshape(-1, 3)
+
+	def colorArray(self):
+		if not self.colored:
+			return None
+		return self.colorVectors
+
+	def fixedArray(self):
+		return self.layout.fixed.copy()
+
+	def setFixed(self, fixed):
+		for (vertex, isFixed) in zip(self.vertices, fixed.tolist()):
+			if isFixed:
+				vertex.fix()
+			else:
+				vertex.release()
+
+	def readPositions(self):
+		with PROFILER.phase("readPositions"):
+			self.layout.positions = numpy.array([(vertex.x(), vertex.y()) for vertex in self.vertices], dtype=float).reshape(-1, 2)
+			clicked = numpy.fromiter((vertex.nowClicked for vertex in self.vertices), dtype=bool, count=len(self.vertices))
+			self.layout.movable = ~(self.layout.fixed | clicked)
+			self.layout.colors = self.colorArray()
+
+	def writePositions(self):
+		with PROFILER.phase("writePositions"):
+			for (vertex, (x, y)) in zip(self.vertices, self.layout.positions.tolist()):
+				vertex.setX(x)
+				vertex.setY(y)
+
+	def displacement(self, kValue):
+		self.readPositions()
+		self.layout.displacement(kValue)
+
+	def repulsiveForcesReference(self, kValue):
 		for (i, vertex) in enumerate(self.vertices):
 			changeDisp = QVector2D(0, 0)
 			for (j, anotherVertex) in enumerate(self.vertices):
@@ -159,7 +312,7 @@ class Graph(object):
 					changeDisp += differenceVector * pow(realK, 2) / pow(differenceVector.length(), 2)
 			vertex.disp += changeDisp
 
-	def attractiveForces(self, kValue):
+	def attractiveForcesReference(self, kValue):
 		for edge in self.edges:
 			if self.colored:
 				realK = kValue * edge.vertex1.distanceInColor(edge.vertex2)
@@ -170,20 +323,48 @@ class Graph(object):
 			edge.vertex1.disp -= changeDisp
 			edge.vertex2.disp += changeDisp
 
-	def displacement(self, kValue):
+	def displacementReference(self, kValue):
 		for vertex in self.vertices:
 			vertex.disp = QVector2D(0, 0)
-		self.repulsiveForces(kValue)
-		self.attractiveForces(kValue)
-
-	def move(self, temperature, area):
-		edgeVertexRate = self.numOfEdges() / self.numOfVertices()
-		kValue = math.sqrt(area / self.numOfVertices() / 40) * edgeVertexRate
-		self.displacement(kValue)
-		for vertex in self.vertices:
-			if not (vertex.isFixed() or vertex.nowClicked):
-				dispLength = vertex.disp.length()
-				vertex += (vertex.disp / dispLength) * min(dispLength, temperature)
+		self.repulsiveForcesReference(kValue)
+		self.attractiveForcesReference(kValue)
+
+	def kValue(self, area):
+		return self.layout.kValue(area)
+
+	def move(self, temperature, area, bounds=None):
+		self.readPositions()
+		step = self.layout.move(temperature, area, None, bounds)
+		self.writePositions()
+		return step
+
+	def localMove(self, area, bounds=None):
+		self.readPositions()
+		step = self.layout.localMove(area, bounds)
+		self.writePositions()
+		return step
+
+	def changeGraph(self, positions=(), edges=(), removedEdges=(), removedVertices=()):
+		# same as Layout.changeGraph, the scene items to add and remove are left in itemsToAdd and itemsToRemove
+		(remap, keepEdge) = self.layout.changeGraph(positions, edges, removedEdges, removedVertices)
+		newVertices = [Vertex(x, y) for (x, y) in numpy.asarray(positions).reshape(-1, 2).tolist()]
+		vertices = self.vertices + newVertices
+		newEdges = [Edge(vertices[vertex1Index], vertices[vertex2Index]) for (vertex1Index, vertex2Index) in edges]
+		keepVertex = (remap >= 0).tolist()
+		keepEdge = keepEdge.tolist()
+		oldVertexCount = len(self.vertices)
+		oldEdgeCount = len(self.edges)
+		self.itemsToRemove = [vertex.circle for (vertex, keep) in zip(self.vertices, keepVertex) if not keep]
+		self.itemsToRemove += [edge for (edge, keep) in zip(self.edges, keepEdge) if not keep]
+		self.itemsToAdd = [vertex.circle for (vertex, keep) in zip(newVertices, keepVertex[oldVertexCount:]) if keep]
+		self.itemsToAdd += [edge for (edge, keep) in zip(newEdges, keepEdge[oldEdgeCount:]) if keep]
+		self.vertices = [vertex for (vertex, keep) in zip(vertices, keepVertex) if keep]
+		self.edges = [edge for (edge, keep) in zip(self.edges + newEdges, keepEdge) if keep]
+		for (index, vertex) in enumerate(self.vertices):
+			vertex.index = index
+			vertex.graph = self
+		self.updateColors()
+		return (remap, keepEdge)
 
 	def __repr__(self):
 		return str(self.vertices)
@@ -195,39 +376,202 @@ class MainWindow(QWidget):
 		self.graph = Graph()
 		self.initUI()
 
-	def paintEvent(self, event):
-		painter = QPainter()
-		painter.begin(self)
-		option = QStyleOptionGraphicsItem()
-		for vertex in self.graph.vertices:
-			vertex.circle.paint(painter, option, self.view)
-		for edge in self.graph.edges:
-			edge.paint(painter, option, self.view)
-		painter.end()
-
 	def timerEvent(self, event):
-		self.moveGraph()
+		PROFILER.tick()
+		with PROFILER.phase("tick"):
+			if self.localRelayout:
+				self.moveLocally()
+				return
+			self.moveGraph()
+			self.checkConvergence()
 
 	def moveGraph(self):
-		self.graph.move(self.temperature(), self.scene.area)
-		for vertex in self.graph.vertices:
-			vertex.setX(max(self.height() / 10, min(self.height() / 10 + self.scene.width(), vertex.x())))
-			vertex.setY(max(self.height() / 10, min(self.height() / 10 + self.scene.height(), vertex.y())))
-			vertex.circle.move()
-			vertex.fixSign.move()
-		for edge in self.graph.edges:
-			edge.move()
+		self.lastStep = self.graph.move(self.temperature(), self.scene.area, self.bounds())
+		self.cooling.update(self.graph.layout.energy)
+		PROFILER.counter("temperature", self.temperature())
+		PROFILER.counter("energy", self.graph.layout.energy)
+		self.moveItems()
 		self.scene.stability += 1
 		self.update()
 
+	def moveItems(self):
+		with PROFILER.phase("moveItems"):
+			if self.graphItem.hasMarks():
+				self.view.viewport().update()
+			if self.batchRenderButton.isChecked():
+				self.graphItem.refresh()
+				return
+			self.graphItem.index = None
+			for vertex in self.graph.vertices:
+				vertex.circle.move()
+				if vertex.isFixed():
+					vertex.fixSign.move()
+			for edge in self.graph.edges:
+				edge.move()
+
+	def moveLocally(self):
+		self.graph.localMove(self.scene.area, self.bounds())
+		self.moveItems()
+		self.update()
+		if self.graph.layout.heat is None:
+			self.killTimer(self.timerID)
+			self.timerID = 0
+			self.localRelayout = False
+
+	def bounds(self):
+		lower = (self.height() / 10, self.height() / 10)
+		upper = (self.height() / 10 + self.scene.width(), self.height() / 10 + self.scene.height())
+		return (lower, upper)
+
+	def checkConvergence(self):
+		if self.lastStep < CONVERGED_STEP:
+			self.stillTicks += 1
+		else:
+			self.stillTicks = 0
+		if self.stillTicks >= STILL_TICKS:
+			self.killTimer(self.timerID)
+			self.timerID = 0
+			self.repackComponents()
+			self.storeLayout()
+		elif self.lastStep < THROTTLE_STEP:
+			self.restartTimer(THROTTLED_INTERVAL)
+		else:
+			self.restartTimer(1)
+
+	def restartTimer(self, interval):
+		if self.timerID != 0 and self.timerInterval == interval:
+			return
+		if self.timerID != 0:
+			self.killTimer(self.timerID)
+		self.timerID = self.startTimer(interval)
+		self.timerInterval = interval
+
+	def rearm(self):
+		self.localRelayout = False
+		if self.worker is not None:
+			self.sendToWorker("reheat", self.scene.stability)
+			return
+		self.cooling.reset()
+		self.stillTicks = 0
+		self.restartTimer(1)
+
+	def vertexChanged(self, vertex):
+		if self.worker is None:
+			return
+		position = (vertex.x(), vertex.y())
+		self.workerOverrides[vertex.index] = position
+		self.sendToWorker("vertex", vertex.index, position, not (vertex.isFixed() or vertex.nowClicked))
+
+	def sendToWorker(self, *command):
+		self.sentCommands += 1
+		self.worker.send(*command)
+
+	def configureWorker(self):
+		if self.worker is None:
+			return
+		self.graph.readPositions()
+		self.sendToWorker("movable", self.graph.layout.movable)
+		self.sendToWorker("configure", {"barnesHut": self.graph.layout.barnesHut,
+			"theta": self.graph.layout.theta, "colors": self.graph.layout.colors})
+
+	def startWorker(self):
+		# a run the GUI timer was still annealing carries on in the worker at the same stability
+		annealing = self.timerID != 0
+		if self.timerID != 0:
+			self.killTimer(self.timerID)
+			self.timerID = 0
+		self.graph.readPositions()
+		self.graph.layout.currentAdjacency()
+		self.worker = SimulationWorker(self.graph.layout, self.scene.height(), self.scene.area,
+			self.bounds(), self.scene.stability, CONVERGED_STEP, STILL_TICKS)
+		self.workerOverrides = {}
+		self.sentCommands = 0
+		self.workerFrame = 0
+		self.worker.start()
+		self.frameTimer.start(FRAME_INTERVAL)
+		if annealing:
+			self.sendToWorker("reheat", self.scene.stability)
+
+	def stopWorker(self):
+		if self.worker is None:
+			return
+		self.frameTimer.stop()
+		self.worker.stop()
+		self.sampleWorker()
+		self.worker = None
+
+	def sampleWorker(self):
+		with PROFILER.phase("sampleWorker"):
+			(frame, applied, stability) = self.worker.latest(self.graph.layout.positions)
+			if frame == self.workerFrame:
+				return
+			self.workerFrame = frame
+			self.scene.stability = stability
+			if applied < self.sentCommands:
+				for (index, position) in self.workerOverrides.items():
+					self.graph.layout.positions[index] = position
+			else:
+				self.workerOverrides = {}
+			self.graph.writePositions()
+			self.moveItems()
+
+	def workerToggle(self, checked):
+		if checked:
+			self.workerToggleButton.setText("GUI thread")
+			self.startWorker()
+		else:
+			self.workerToggleButton.setText("Worker thread")
+			self.stopWorker()
+
 	def stabilization(self):
 		if self.timerID != 0:
 			self.killTimer(self.timerID)
 			self.timerID = 0
-		self.timerID = self.startTimer(1)
+		self.configureWorker()
+		self.rearm()
+
+	def multilevel(self):
+		if self.timerID != 0:
+			self.killTimer(self.timerID)
+			self.timerID = 0
+		self.stopWorker()
+		self.graph.readPositions()
+		multilevelLayout(self.graph.layout, self.scene.height())
+		self.graph.writePositions()
+		self.moveItems()
+		self.scene.stability = REFINE_STABILITY
+		self.update()
+		if self.workerToggleButton.isChecked():
+			self.startWorker()
+		self.stabilization()
+
+	def repackComponents(self):
+		# the components settle without forces between them, so they are packed again once still
+		self.graph.readPositions()
+		if self.graph.layout.repackComponents(self.scene.height()) > 1:
+			self.graph.writePositions()
+			self.moveItems()
+			self.update()
+
+	def layoutComponents(self):
+		# every component annealed on its own and packed; the result is final, so nothing is reheated
+		if self.timerID != 0:
+			self.killTimer(self.timerID)
+			self.timerID = 0
+		self.stopWorker()
+		self.graph.readPositions()
+		executor = self.repulsionPool.executor if self.repulsionPool is not None else None
+		componentLayout(self.graph.layout, self.scene.height(), self.placementBox.currentData(), executor=executor)
+		self.graph.writePositions()
+		self.moveItems()
+		self.scene.stability = PLACED_STABILITY
+		self.update()
+		if self.workerToggleButton.isChecked():
+			self.startWorker()
+		self.storeLayout()
 
 	def temperature(self):
-		return self.scene.height() / self.scene.stability
+		return self.scene.height() / self.scene.stability * self.cooling.scale
 
 	def colorToggle(self, checked):
 		if self.timerID != 0:
@@ -242,59 +586,236 @@ class MainWindow(QWidget):
 		self.scene.stability = 1
 		self.stabilization()
 
+	def barnesHutToggle(self, checked):
+		self.graph.layout.barnesHut = checked
+		if checked:
+			self.barnesHutToggleButton.setText("Exact")
+		else:
+			self.barnesHutToggleButton.setText("Approximate")
+		self.configureWorker()
+
+	def thetaChanged(self, value):
+		self.graph.layout.theta = value
+		self.configureWorker()
+
+	def processesChanged(self, value):
+		# the simulation thread may be inside the pool, so it is stopped while the pool is replaced
+		restartWorker = self.worker is not None
+		self.stopWorker()
+		if self.repulsionPool is not None:
+			self.repulsionPool.close()
+		self.repulsionPool = RepulsionPool(value) if value > 0 else None
+		self.graph.layout.pool = self.repulsionPool
+		if restartWorker:
+			self.startWorker()
+
 	def hideEdgeToggle(self, checked):
 		if checked:
-			for edge in self.graph.edges:
-				edge.setVisible(False)
 			self.hideEdgeToggleButton.setText("Show edge")
 		else:
-			for edge in self.graph.edges:
-				edge.setVisible(True)
 			self.hideEdgeToggleButton.setText("Hide edge")
+		self.showGraph()
+
+	def batchRenderToggle(self, checked):
+		if checked:
+			self.batchRenderButton.setText("Item render")
+		else:
+			self.batchRenderButton.setText("Batch render")
+		self.showGraph()
+		self.moveItems()
+
+	def showGraph(self):
+		batched = self.batchRenderButton.isChecked()
+		edgesVisible = not self.hideEdgeToggleButton.isChecked()
+		for vertex in self.graph.vertices:
+			vertex.circle.setVisible(not batched)
+		for edge in self.graph.edges:
+			edge.setVisible(edgesVisible and not batched)
+		self.graphItem.graph = self.graph
+		self.graphItem.edgesVisible = edgesVisible
+		self.graphItem.setVisible(batched)
+		self.graphItem.refresh()
 
 	def readGraph(self):
 		if self.timerID != 0:
 			self.killTimer(self.timerID)
 			self.timerID = 0
+		self.stopWorker()
 		self.graph.colored = False
 		self.colorToggleButton.setChecked(False)
 		self.colorToggleButton.setText("Color")
+		self.closeStream()
+		self.localRelayout = False
+		self.storeLayout()
 		for vertex in self.graph.vertices:
 			self.scene.removeItem(vertex.circle)
 		for edge in self.graph.edges:
 			self.scene.removeItem(edge)
-		readingFile = str(self.selectBox.currentText())
-		graphData = __import__("graphData." + readingFile, 
-			globals(), locals(), ["vertexCount", "edges"], 0)
+		graphData = self.cache.open(self.selectBox.currentData(), 2)
+		self.graphKey = graphData.key
 		vertexCount = graphData.vertexCount
-		edges = graphData.edges
-		vertices = []
-		for i in range(vertexCount):
-			x = self.height() / 2 + self.height() / 5 * math.cos((i / vertexCount) * (2 * math.pi))
-			y = self.height() / 2 + self.height() / 5 * math.sin((i / vertexCount) * (2 * math.pi))
-			vertices.append(Vertex(x, y))
+		warm = self.warmStartButton.isChecked() and graphData.positions is not None
+		if warm:
+			positions = graphData.positions
+		else:
+			positions = componentPlacement(self.placementBox.currentData(), graphData.adjacency, self.scene.height())
+		vertices = [Vertex(x, y) for (x, y) in positions.tolist()]
 		self.graph = Graph(*vertices)
-		for (vertex1, vertex2) in edges:
-			self.graph.addEdge(vertex1, vertex2)
+		self.graph.layout.pool = self.repulsionPool
+		self.graph.layout.barnesHut = self.barnesHutToggleButton.isChecked()
+		self.graph.layout.theta = self.thetaBox.value()
+		self.graph.addEdges(graphData.edges, graphData.adjacency)
+		self.stream = GraphStream(vertexCount)
+		self.graphItem.clearMarks()
 		for edge in self.graph.edges:
 			self.scene.addItem(edge)
-		if self.hideEdgeToggleButton.isChecked():
-			for edge in self.graph.edges:
-				edge.setVisible(False)
 		for vertex in self.graph.vertices:
 			self.scene.addItem(vertex.circle)
-		self.scene.stability = 1
+		if warm and graphData.fixed is not None:
+			self.graph.setFixed(graphData.fixed)
+		self.showGraph()
+		if warm:
+			self.scene.stability = WARM_STABILITY
+		elif self.placementBox.currentData() != "circle":
+			self.scene.stability = PLACED_STABILITY
+		else:
+			self.scene.stability = 1
+		if self.workerToggleButton.isChecked():
+			self.startWorker()
 		self.update()
 
+	def saveLayoutFile(self):
+		self.graph.readPositions()
+		defaultPath = os.path.splitext(self.selectBox.currentText())[0] + LAYOUT_EXTENSION
+		(path, selected) = QFileDialog.getSaveFileName(self, "Save layout", defaultPath, "Layout (*" + LAYOUT_EXTENSION + ")")
+		if path:
+			saveLayout(path, self.graph.layout.positions, self.graph.fixedArray(), self.graphKey)
+
+	def loadLayoutFile(self):
+		(path, selected) = QFileDialog.getOpenFileName(self, "Load layout", "", "Layout (*" + LAYOUT_EXTENSION + ")")
+		if not path:
+			return
+		try:
+			layoutData = loadLayout(path)
+		except (OSError, ValueError, KeyError) as error:
+			QMessageBox.warning(self, "Load layout", str(error))
+			return
+		if not layoutData.fits(self.graph.numOfVertices(), 2):
+			QMessageBox.warning(self, "Load layout", path + " is not a 2D layout of " + str(self.graph.numOfVertices()) + " vertices")
+			return
+		if layoutData.key is not None and self.graphKey is not None and layoutData.key != self.graphKey:
+			QMessageBox.warning(self, "Load layout", path + " was saved for a different graph file")
+			return
+		if self.timerID != 0:
+			self.killTimer(self.timerID)
+			self.timerID = 0
+		self.stopWorker()
+		self.graph.layout.positions = numpy.array(layoutData.positions, dtype=float)
+		self.graph.writePositions()
+		self.graph.setFixed(layoutData.fixed)
+		self.moveItems()
+		self.scene.stability = WARM_STABILITY
+		self.update()
+		if self.workerToggleButton.isChecked():
+			self.startWorker()
+		self.stabilization()
+
+	def openStream(self):
+		(path, selected) = QFileDialog.getOpenFileName(self, "Stream graph events", "", "Graph events (*)")
+		if not path:
+			return
+		self.reader = EventReader(path)
+		self.reader.start()
+		self.streamTimer.start(STREAM_INTERVAL)
+
+	def closeStream(self):
+		self.streamTimer.stop()
+		self.reader = None
+
+	def readStream(self):
+		events = self.reader.drain()
+		if events:
+			self.applyStream(events)
+		elif not self.reader.is_alive():
+			if self.reader.error is not None:
+				QMessageBox.warning(self, "Stream graph events", str(self.reader.error))
+			self.closeStream()
+
+	def applyStream(self, events):
+		# applies a batch of events to the live graph and re-heats only the region around them
+		restartWorker = self.worker is not None
+		self.stopWorker()
+		self.graph.readPositions()
+		center = (self.height() / 2, self.height() / 2)
+		temperature = self.scene.height() / REHEAT_STABILITY
+		self.stream.apply(self.graph.layout, events, center, self.scene.height() / 40, temperature, self.graph)
+		for item in self.graph.itemsToRemove:
+			self.scene.removeItem(item)
+		for item in self.graph.itemsToAdd:
+			self.scene.addItem(item)
+		# a streamed graph no longer matches the cached file
+		self.graphKey = None
+		self.graphItem.clearMarks()
+		self.showGraph()
+		self.moveItems()
+		if restartWorker:
+			self.startWorker()
+			self.sendToWorker("reheat", self.scene.stability)
+		elif self.timerID == 0:
+			self.localRelayout = True
+			self.restartTimer(1)
+		self.update()
+
+	def profileToggle(self, checked):
+		PROFILER.enabled = checked
+		if checked:
+			PROFILER.clear()
+			self.profileButton.setText("Hide profile")
+			self.view.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
+		else:
+			self.profileButton.setText("Profile")
+			self.view.setViewportUpdateMode(QGraphicsView.MinimalViewportUpdate)
+		self.view.viewport().update()
+
+	def hudLines(self):
+		lines = [format(PROFILER.rate(), ".1f") + " it/s",
+			"frame " + format(PROFILER.mean("paint") * 1000, ".2f") + " ms",
+			"temperature " + format(self.temperature(), ".3g"),
+			"energy " + format(self.graph.layout.energy, ".3g")]
+		for (name, seconds) in PROFILER.summary()[:HUD_PHASES]:
+			lines.append(name + " " + format(seconds * 1000, ".2f") + " ms")
+		return lines
+
+	def exportTrace(self):
+		(path, selected) = QFileDialog.getSaveFileName(self, "Export trace", "trace.json", "Trace events (*.json)")
+		if path:
+			PROFILER.exportTrace(path)
+
 	def releaseFixedVertices(self):
 		if self.timerID != 0:
 			self.killTimer(self.timerID)
 			self.timerID = 0
-		for vertex in self.graph.vertices:
-			vertex.release()
+		# a rubber-band selection limits the release to the selected vertices
+		selected = self.graphItem.selection.tolist() if len(self.graphItem.selection) else range(self.graph.numOfVertices())
+		for index in selected:
+			self.graph.vertices[index].release()
 		self.scene.stability = min(16, self.scene.stability)
 		self.stabilization()
 
+	def closeEvent(self, event):
+		self.stopWorker()
+		self.storeLayout()
+		if self.repulsionPool is not None:
+			self.repulsionPool.close()
+			self.repulsionPool = None
+		super().closeEvent(event)
+
+	def storeLayout(self):
+		if self.graphKey is None or self.graph.numOfVertices() == 0:
+			return
+		self.graph.readPositions()
+		self.cache.storeLayout(self.graphKey, self.graph.layout.positions, self.graph.fixedArray())
+
 	def initUI(self):
 		self.exitButton = QPushButton("Exit", self)
 		self.exitButton.setShortcut("Ctrl+Q")
@@ -303,6 +824,34 @@ class MainWindow(QWidget):
 		self.stabilizationButton = QPushButton("Stabilization", self)
 		self.stabilizationButton.clicked.connect(self.stabilization)
 
+		self.multilevelButton = QPushButton("Multilevel", self)
+		self.multilevelButton.clicked.connect(self.multilevel)
+
+		self.componentsButton = QPushButton("Components", self)
+		self.componentsButton.clicked.connect(self.layoutComponents)
+		self.componentsButton.setToolTip("Lay out every connected component on its own and pack them")
+
+		self.barnesHutToggleButton = QPushButton("Approximate", self)
+		self.barnesHutToggleButton.toggled.connect(self.barnesHutToggle)
+		self.barnesHutToggleButton.setCheckable(True)
+
+		self.thetaBox = QDoubleSpinBox(self)
+		self.thetaBox.setPrefix("theta: ")
+		self.thetaBox.setRange(0.1, 2.0)
+		self.thetaBox.setSingleStep(0.1)
+		self.thetaBox.setValue(0.8)
+		self.thetaBox.valueChanged.connect(self.thetaChanged)
+
+		self.processesBox = QSpinBox(self)
+		self.processesBox.setPrefix("processes: ")
+		self.processesBox.setSpecialValueText("serial repulsion")
+		self.processesBox.setRange(0, os.cpu_count() or 1)
+		self.processesBox.valueChanged.connect(self.processesChanged)
+
+		self.workerToggleButton = QPushButton("Worker thread", self)
+		self.workerToggleButton.toggled.connect(self.workerToggle)
+		self.workerToggleButton.setCheckable(True)
+
 		self.releaseButton = QPushButton("Release", self)
 		self.releaseButton.clicked.connect(self.releaseFixedVertices)
 
@@ -314,19 +863,64 @@ class MainWindow(QWidget):
 		self.hideEdgeToggleButton.toggled.connect(self.hideEdgeToggle)
 		self.hideEdgeToggleButton.setCheckable(True)
 
+		self.batchRenderButton = QPushButton("Batch render", self)
+		self.batchRenderButton.toggled.connect(self.batchRenderToggle)
+		self.batchRenderButton.setCheckable(True)
+		self.batchRenderButton.setToolTip("Draw only the visible part of the graph in bulk calls; item render moves every vertex and edge item on each step.\n"
+			"With more than "
+			+ str(pow(GraphItem.COLOR_LEVELS, 3)) + " distinct vertex colors they are rounded to "
+			+ str(GraphItem.COLOR_LEVELS) + " levels per channel")
+
+		self.saveLayoutButton = QPushButton("Save layout", self)
+		self.saveLayoutButton.clicked.connect(self.saveLayoutFile)
+
+		self.loadLayoutButton = QPushButton("Load layout", self)
+		self.loadLayoutButton.clicked.connect(self.loadLayoutFile)
+
+		self.warmStartButton = QPushButton("Warm start", self)
+		self.warmStartButton.setCheckable(True)
+		self.warmStartButton.setChecked(True)
+
+		self.streamButton = QPushButton("Stream events", self)
+		self.streamButton.clicked.connect(self.openStream)
+
+		self.profileButton = QPushButton("Profile", self)
+		self.profileButton.toggled.connect(self.profileToggle)
+		self.profileButton.setCheckable(True)
+
+		self.exportTraceButton = QPushButton("Export trace", self)
+		self.exportTraceButton.clicked.connect(self.exportTrace)
+
+		self.placementBox = QComboBox(self)
+		for (name, placement) in PLACEMENT_NAMES:
+			self.placementBox.addItem(name, placement)
+		self.placementBox.setCurrentIndex(1)
+
 		self.selectBox = QComboBox(self)
-		fileList = [os.path.basename(fileName) for fileName in glob.glob("./graphData/*.py")]
-		fileList.remove("__init__.py")
-		for index, file in enumerate(fileList):
-			self.selectBox.insertItem(index, file[:-3])
+		for (index, path) in enumerate(catalog()):
+			self.selectBox.insertItem(index, catalogName(path), path)
 		self.selectBox.activated.connect(self.readGraph)
 
 		self.toolLayout = QVBoxLayout()
 		self.toolLayout.addWidget(self.exitButton)
 		self.toolLayout.addWidget(self.stabilizationButton)
+		self.toolLayout.addWidget(self.barnesHutToggleButton)
+		self.toolLayout.addWidget(self.thetaBox)
+		self.toolLayout.addWidget(self.multilevelButton)
+		self.toolLayout.addWidget(self.componentsButton)
+		self.toolLayout.addWidget(self.processesBox)
+		self.toolLayout.addWidget(self.workerToggleButton)
 		self.toolLayout.addWidget(self.releaseButton)
 		self.toolLayout.addWidget(self.colorToggleButton)
 		self.toolLayout.addWidget(self.hideEdgeToggleButton)
+		self.toolLayout.addWidget(self.batchRenderButton)
+		self.toolLayout.addWidget(self.saveLayoutButton)
+		self.toolLayout.addWidget(self.loadLayoutButton)
+		self.toolLayout.addWidget(self.warmStartButton)
+		self.toolLayout.addWidget(self.placementBox)
+		self.toolLayout.addWidget(self.streamButton)
+		self.toolLayout.addWidget(self.profileButton)
+		self.toolLayout.addWidget(self.exportTraceButton)
 		self.toolLayout.addWidget(self.selectBox)
 		
 		desktop = QDesktopWidget()
@@ -337,9 +931,18 @@ class MainWindow(QWidget):
 		self.setGeometry(windowX, windowY, width, height)
 		sceneRect = QRectF(self.height() / 10, self.height() / 10, self.height() / 10 * 8, self.height() / 10 * 8)
 		self.scene = QGraphicsScene(sceneRect, self)
-		self.view = QGraphicsView(self.scene, self)
+		self.scene.setItemIndexMethod(QGraphicsScene.NoIndex)
+		self.view = GraphView(self.scene, self)
+		self.view.hudLines = self.hudLines
 		self.scene.area = self.scene.width() * self.scene.height()
+		self.graphItem = GraphItem(self.graph)
+		self.graphItem.setVisible(False)
+		self.scene.addItem(self.graphItem)
+		self.view.setGraphItem(self.graphItem)
+		self.batchRenderButton.setChecked(True)
 		self.scene.stability = 1
+		self.scene.rearm = self.rearm
+		self.scene.vertexChanged = self.vertexChanged
 		self.setWindowTitle("visibleGraph")
 
 		self.mainLayout = QHBoxLayout(self)
@@ -348,6 +951,20 @@ class MainWindow(QWidget):
 		self.setLayout(self.mainLayout)
 
 		self.timerID = 0
+		self.timerInterval = 1
+		self.cooling = AdaptiveCooling()
+		self.stillTicks = 0
+		self.lastStep = math.inf
+		self.worker = None
+		self.frameTimer = QTimer(self)
+		self.frameTimer.timeout.connect(self.sampleWorker)
+		self.cache = GraphCache()
+		self.graphKey = None
+		self.repulsionPool = None
+		self.localRelayout = False
+		self.reader = None
+		self.streamTimer = QTimer(self)
+		self.streamTimer.timeout.connect(self.readStream)
 
 		self.readGraph()
 		self.show()
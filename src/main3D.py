@@ -2,12 +2,27 @@
 # coding: utf-8
 
 from PyQt5.QtWidgets import QGraphicsEllipseItem, QGraphicsLineItem, QPushButton
-from PyQt5.QtWidgets import QStyleOptionGraphicsItem, QComboBox, QVBoxLayout
+from PyQt5.QtWidgets import QComboBox, QVBoxLayout
 from PyQt5.QtWidgets import QDesktopWidget, QGraphicsScene, QGraphicsView, QHBoxLayout
-from PyQt5.QtWidgets import QApplication, QWidget, qApp, QLineEdit, QLabel
+from PyQt5.QtWidgets import QApplication, QWidget, qApp, QLineEdit, QLabel, QDoubleSpinBox, QSpinBox
+from PyQt5.QtWidgets import QFileDialog, QMessageBox
 from PyQt5.QtCore import QRectF, Qt, QLineF, QRect
-from PyQt5.QtGui import QVector3D, QPen, QBrush, QVector2D, QPainter, QMatrix3x3
-import os, math, sys, glob, random, numpy
+from PyQt5.QtGui import QVector3D, QPen, QBrush
+import os, sys, random, numpy
+from src.layout import Layout, WARM_STABILITY
+from src.placement import PLACED_STABILITY
+from src.components import componentPlacement, componentLayout
+from src.graphFile import catalog, catalogName
+from src.graphCache import GraphCache
+from src.layoutFile import LAYOUT_EXTENSION, saveLayout, loadLayout
+from src.renderer import GraphItem3D, SelectionBand, paintHud
+from src.multilevel import multilevelLayout, REFINE_STABILITY
+from src.profiler import PROFILER
+from src.camera import Camera
+from src.parallelRepulsion import RepulsionPool
+
+HUD_PHASES = 6
+PLACEMENT_NAMES = (("Circle", "circle"), ("Pivot MDS", "pivotMds"), ("Spectral", "spectral"))
 
 
 class Vertex3D(QVector3D):
@@ -15,12 +30,13 @@ class Vertex3D(QVector3D):
 	def __init__(self, x, y, z):
 		super().__init__(x, y, z)
 		self.disp = QVector3D(0, 0, 0)
-		self.edges = []
+		self.index = None
+		self.graph = None
 		self.circle = Vertex3DCircle(self)
 		self.label = None
 
-	def addEdge(self, edge):
-		self.edges.append(edge)
+	def incidentEdges(self):
+		return self.graph.incidentEdges(self.index)
 
 	def setLabel(self, label):
 		self.label = label
@@ -29,35 +45,6 @@ class Vertex3D(QVector3D):
 		return "(" + str(self.x()) + ", " + str(self.y()) + ", " + str(self.z()) + ")"
 
 
-class MyM3R(QMatrix3x3):
-
-	def __init__(self, data):
-		super().__init__(data)
-
-	def transform(self, vector):
-		newVector = [0, 0, 0]
-		for i in range(3):
-			newVector[i] = self[i, 0] * vector.x() + self[i, 1] * vector.y() + self[i, 2] * vector.z()
-		vector.setX(newVector[0])
-		vector.setY(newVector[1])
-		vector.setZ(newVector[2])
-
-	def __repr__(self):
-		string = " / "
-		for i in range(3):
-			for j in range(3):
-				string += str(self[i, j])
-				if j != 2:
-					string += "  "
-			if i == 0:
-				string += " \\\n｜ "
-			elif i == 1:
-				string += " ｜\n \\ "
-			else:
-				string += " /"
-		return string
-
-
 class Vertex3DCircle(QGraphicsEllipseItem):
 	def __init__(self, vertex):
 		self.radius = 5
@@ -69,18 +56,9 @@ class Vertex3DCircle(QGraphicsEllipseItem):
 		self.setPen(self.pen)
 		self.setBrush(self.brush)
 
-	def contains(self, point):
-		center = QVector2D(self.vertex.x() + 12, self.vertex.y())
-		vector = QVector2D(point)
-		diff = center - vector
-		if diff.length() < self.radius + 1:
-			return True
-		else:
-			return False
-
-	def move(self):
-		self.radius = 10 * self.vertex.z() / self.scene().height()
-		self.setRect(QRectF(self.vertex.x() - self.radius, self.vertex.y() - self.radius, self.radius * 2, self.radius * 2))
+	def move(self, x, y, radius):
+		self.radius = radius
+		self.setRect(QRectF(x - self.radius, y - self.radius, self.radius * 2, self.radius * 2))
 
 
 class Edge3D(QGraphicsLineItem):
@@ -90,8 +68,8 @@ class Edge3D(QGraphicsLineItem):
 		line = QLineF(self.vertex1.toPointF(), self.vertex2.toPointF())
 		super().__init__(line)
 
-	def move(self):
-		newLine = QLineF(self.vertex1.toPointF(), self.vertex2.toPointF())
+	def move(self, point1, point2):
+		newLine = QLineF(point1[0], point1[1], point2[0], point2[1])
 		self.setLine(newLine)
 
 
@@ -100,14 +78,32 @@ class Graph3D(object):
 	def __init__(self, *vertices):
 		self.vertices = list(vertices)
 		self.edges = []
+		for (index, vertex) in enumerate(self.vertices):
+			vertex.index = index
+			vertex.graph = self
+		self.layout = Layout(len(self.vertices), dimension=3)
+		self.readPositions()
 
 	def addEdge(self, vertex1Index, vertex2Index):
 		vertex1 = self.vertices[vertex1Index]
 		vertex2 = self.vertices[vertex2Index]
 		edge = Edge3D(vertex1, vertex2)
 		self.edges.append(edge)
-		vertex1.addEdge(edge)
-		vertex2.addEdge(edge)
+		self.layout.addEdge(vertex1Index, vertex2Index)
+
+	def addEdges(self, edges, adjacency=None):
+		for (vertex1Index, vertex2Index) in numpy.asarray(edges).reshape(-1, 2).tolist():
+			self.edges.append(Edge3D(self.vertices[vertex1Index], self.vertices[vertex2Index]))
+		if adjacency is None:
+			self.layout.addEdges(edges)
+		else:
+			self.layout.adjacency = adjacency
+
+	def incidentEdges(self, vertexIndex):
+		return [self.edges[edgeIndex] for edgeIndex in self.layout.currentAdjacency().incidentEdges(vertexIndex)]
+
+	def degree(self, vertexIndex):
+		return self.layout.currentAdjacency().degree(vertexIndex)
 
 	def numOfVertices(self):
 		return len(self.vertices)
@@ -115,7 +111,30 @@ class Graph3D(object):
 	def numOfEdges(self):
 		return len(self.edges)
 
-	def repulsiveForces(self, kValue):
+	def fixedArray(self):
+		# the 3D view has no pinning of its own, fixed flags only come from loaded layouts
+		return self.layout.fixed.copy()
+
+	def setFixed(self, fixed):
+		self.layout.fixed = numpy.array(fixed, dtype=bool)
+		self.layout.movable = ~self.layout.fixed
+
+	def readPositions(self):
+		with PROFILER.phase("readPositions"):
+			self.layout.positions = numpy.array([(vertex.x(), vertex.y(), vertex.z()) for vertex in self.vertices], dtype=float).reshape(-1, 3)
+
+	def writePositions(self):
+		with PROFILER.phase("writePositions"):
+			for (vertex, (x, y, z)) in zip(self.vertices, self.layout.positions.tolist()):
+				vertex.setX(x)
+				vertex.setY(y)
+				vertex.setZ(z)
+
+	def displacement(self, kValue, center):
+		self.readPositions()
+		self.layout.displacement(kValue, (center.x(), center.y(), center.z()))
+
+	def repulsiveForcesReference(self, kValue):
 		for (i, vertex) in enumerate(self.vertices):
 			changeDisp = QVector3D(0, 0, 0)
 			for (j, anotherVertex) in enumerate(self.vertices):
@@ -129,14 +148,14 @@ class Graph3D(object):
 					changeDisp += differenceVector * pow(kValue, 2) / pow(differenceVector.length(), 2)
 			vertex.disp += changeDisp
 
-	def attractiveForces(self, kValue):
+	def attractiveForcesReference(self, kValue):
 		for edge in self.edges:
 			differenceVector = QVector3D(edge.vertex1 - edge.vertex2)
 			changeDisp = differenceVector * differenceVector.length() / kValue
 			edge.vertex1.disp -= changeDisp
 			edge.vertex2.disp += changeDisp
 
-	def centering(self, center):
+	def centeringReference(self, center):
 		graphCenter = QVector3D(0, 0, 0)
 		for vertex in self.vertices:
 			graphCenter += vertex
@@ -145,20 +164,21 @@ class Graph3D(object):
 		for vertex in self.vertices:
 			vertex.disp += changeDisp
 
-	def displacement(self, kValue, center):
+	def displacementReference(self, kValue, center):
 		for vertex in self.vertices:
 			vertex.disp = QVector3D(0, 0, 0)
-		self.repulsiveForces(kValue)
-		self.attractiveForces(kValue)
-		self.centering(center)
-
-	def move(self, temperature, area, center):
-		edgeVertexRate = self.numOfEdges() / self.numOfVertices()
-		kValue = math.sqrt(area / self.numOfVertices() / 40) * edgeVertexRate
-		self.displacement(kValue, center)
-		for vertex in self.vertices:
-			dispLength = vertex.disp.length()
-			vertex += (vertex.disp / dispLength) * min(dispLength, temperature)
+		self.repulsiveForcesReference(kValue)
+		self.attractiveForcesReference(kValue)
+		self.centeringReference(center)
+
+	def kValue(self, area):
+		return self.layout.kValue(area)
+
+	def move(self, temperature, area, center, bounds=None):
+		self.readPositions()
+		step = self.layout.move(temperature, area, (center.x(), center.y(), center.z()), bounds)
+		self.writePositions()
+		return step
 
 	def __repr__(self):
 		return str(self.vertices)
@@ -168,62 +188,60 @@ class MyView(QGraphicsView):
 
 	def __init__(self, scene, parent):
 		super().__init__(scene, parent)
+		self.hudLines = None
+		self.graphItem = None
+		self.band = None
+		self.viewport().setMouseTracking(True)
+
+	def setGraphItem(self, graphItem):
+		self.graphItem = graphItem
+		self.band = SelectionBand(self, graphItem)
+
+	def paintEvent(self, event):
+		with PROFILER.phase("paint"):
+			super().paintEvent(event)
+
+	def drawForeground(self, painter, rect):
+		if self.graphItem is not None:
+			self.graphItem.paintOverlay(painter)
+		if PROFILER.enabled and self.hudLines is not None:
+			paintHud(painter, self.hudLines())
 
 	def center(self):
 		widget = self.parent()
 		return QVector3D(widget.height() / 2, widget.height() / 2, widget.height() / 2)
 
 	def mousePressEvent(self, event):
-		for vertex in self.parent().graph.vertices:
-			if vertex.circle.contains(event.pos() + self.pos()) and vertex.label != None:
-				self.parent().labelLine.setText(vertex.label)
-				break
 		widget = self.parent()
-		if widget.timerID != 0:
-			widget.killTimer(widget.timerID)
-			widget.timerID = 0
-		self.verticesPosWhenClicked = []
+		vertex = self.graphItem.pick(self.mapToScene(event.pos()))
+		if vertex is not None and vertex.label != None:
+			widget.labelLine.setText(vertex.label)
+		if event.button() == Qt.LeftButton and event.modifiers() & Qt.ShiftModifier:
+			# Shift-drag selects vertices instead of rotating, with Ctrl added to the selection
+			self.band.start(event.pos())
+			return
+		widget.camera.begin()
 		self.mousePosWhenClicked = event.pos()
-		for vertex in self.parent().graph.vertices:
-			self.verticesPosWhenClicked.append(QVector3D(vertex))
 
 	def mouseMoveEvent(self, event):
-		vertices = self.parent().graph.vertices
-		verticesPos = [QVector3D(i) for i in self.verticesPosWhenClicked]
-		for (pos, afterPos) in zip(self.verticesPosWhenClicked, verticesPos):
-			afterPos.setX(pos.x() - self.center().x())
-			afterPos.setY(pos.y() - self.center().y())
-			afterPos.setZ(pos.z() - self.center().z())
+		if self.band.isActive():
+			self.band.drag(event.pos())
+			return
+		if event.buttons() == Qt.NoButton:
+			if self.graphItem.hover(self.mapToScene(event.pos())):
+				hovered = self.graphItem.hovered
+				if hovered is not None and self.parent().graph.vertices[hovered].label != None:
+					self.parent().labelLine.setText(self.parent().graph.vertices[hovered].label)
+				self.viewport().update()
+			return
+		# only the camera turns, the simulation keeps running on the untouched positions
 		disp = event.pos() - self.mousePosWhenClicked
-		xAngle = QVector2D(disp).length() * 2 * math.pi / 360
-		if QVector2D(disp).length() != 0:
-			if (-numpy.sign(disp.x())) != 0:
-				zAngle = math.acos((-disp.y()) / QVector2D(disp).length()) * (-numpy.sign(disp.x()))
-			else:
-				zAngle = math.acos((-disp.y()) / QVector2D(disp).length())
-		else:
-			zAngle = 0
-		xTurnList = [1, 0, 0, 0, math.cos(xAngle), -math.sin(xAngle), 0, math.sin(xAngle), math.cos(xAngle)]
-		zTurnList = [math.cos(zAngle), -math.sin(zAngle), 0, math.sin(zAngle), math.cos(zAngle), 0, 0, 0, 1]
-		minusZTurnList = [math.cos(-zAngle), -math.sin(-zAngle), 0, math.sin(-zAngle), math.cos(-zAngle), 0, 0, 0, 1]
-		zTurnMatrix = MyM3R(zTurnList)
-		xTurnMatrix = MyM3R(xTurnList)
-		minusZTurnMatrix = MyM3R(minusZTurnList)
-		for (pos, vertex) in zip(verticesPos, vertices):
-			zTurnMatrix.transform(pos)
-			xTurnMatrix.transform(pos)
-			minusZTurnMatrix.transform(pos)
-			vertex.setX(pos.x() + self.center().x())
-			vertex.setY(pos.y() + self.center().y())
-			vertex.setZ(pos.z() + self.center().z())
-		for vertex in vertices:
-			vertex.circle.move()
-		for edge in self.parent().graph.edges:
-			edge.move()
+		self.parent().camera.drag(disp.x(), disp.y())
+		self.parent().moveItems()
 
 	def mouseReleaseEvent(self, event):
-		if self.parent().timerID == 0:
-			self.parent().timerID = self.parent().startTimer(1)
+		if self.band.isActive() and event.button() == Qt.LeftButton:
+			self.band.finish(event.pos(), bool(event.modifiers() & Qt.ControlModifier))
 
 
 class MainWindow3D(QWidget):
@@ -233,45 +251,66 @@ class MainWindow3D(QWidget):
 		self.graph = Graph3D()
 		self.initUI()
 
-	def paintEvent(self, event):
-		painter = QPainter()
-		painter.begin(self)
-		option = QStyleOptionGraphicsItem()
-		for vertex in self.graph.vertices:
-			vertex.circle.paint(painter, option, self.view)
-		for edge in self.graph.edges:
-			edge.paint(painter, option, self.view)
-		painter.end()
-
 	def timerEvent(self, event):
+		PROFILER.tick()
 		if self.temperature() > 1:
-			self.moveGraph()
-			self.autosize()
+			with PROFILER.phase("tick"):
+				self.moveGraph()
+				self.autosize()
 		else:
 			self.killTimer(self.timerID)
 			self.timerID = 0
+			self.repackComponents()
+			self.storeLayout()
 
 	def moveGraph(self):
-		self.graph.move(self.temperature(), self.scene.area, self.view.center())
-		for vertex in self.graph.vertices:
-			vertex.setX(max(self.height() / 10, min(self.height() / 10 + self.scene.width(), vertex.x())))
-			vertex.setY(max(self.height() / 10, min(self.height() / 10 + self.scene.height(), vertex.y())))
-			vertex.setZ(max(self.height() / 10, min(self.height() / 10 + self.scene.height(), vertex.z())))
-			vertex.circle.move()
-		for edge in self.graph.edges:
-			edge.move()
+		self.graph.move(self.temperature(), self.scene.area, self.view.center(), self.bounds())
+		PROFILER.counter("temperature", self.temperature())
+		PROFILER.counter("energy", self.graph.layout.energy)
+		self.moveItems()
 		self.scene.stability += 1
 		self.update()
 
+	def moveItems(self):
+		with PROFILER.phase("moveItems"):
+			if self.graphItem.hasMarks():
+				self.view.viewport().update()
+			if self.batchRenderButton.isChecked():
+				self.updateCamera()
+				self.graphItem.refresh()
+				return
+			self.graphItem.index = None
+			# the item path shares the projection but keeps insertion order, depth sorting is left to the batch renderer
+			(screen, scales) = self.screenPositions()
+			screen = screen.tolist()
+			for (vertex, (x, y), scale) in zip(self.graph.vertices, screen, scales.tolist()):
+				vertex.circle.move(x, y, GraphItem3D.RADIUS * scale)
+			for edge in self.graph.edges:
+				edge.move(screen[edge.vertex1.index], screen[edge.vertex2.index])
+
+	def updateCamera(self):
+		# pivot on the view center, eye one view height in front of it
+		center = self.view.center()
+		self.camera.pivot = numpy.array((center.x(), center.y(), center.z()))
+		self.camera.distance = center.z() * 2
+
+	def screenPositions(self):
+		# the whole graph through the camera in one batch
+		self.updateCamera()
+		return self.camera.perspective(self.graph.layout.positions)
+
+	def resetView(self):
+		self.camera.reset()
+		self.moveItems()
+
 	def autosize(self):
 		center = self.view.center()
-		graphRadius = 0
-		for vertex in self.graph.vertices:
-			graphRadius = max(graphRadius, (center - vertex).length())
-		if graphRadius < self.scene.height() * 11 / 24:
-			self.zoomIn()
-		else:
-			self.zoomOut()
+		self.scene.area = self.graph.layout.autosize(self.scene.area, (center.x(), center.y(), center.z()), self.scene.height(), self.temperature())
+
+	def bounds(self):
+		lower = (self.height() / 10, self.height() / 10, self.height() / 10)
+		upper = (self.height() / 10 + self.scene.width(), self.height() / 10 + self.scene.height(), self.height() / 10 + self.scene.height())
+		return (lower, upper)
 
 	def stabilization(self):
 		if self.timerID != 0:
@@ -279,59 +318,200 @@ class MainWindow3D(QWidget):
 			self.timerID = 0
 		self.timerID = self.startTimer(1)
 
+	def multilevel(self):
+		if self.timerID != 0:
+			self.killTimer(self.timerID)
+			self.timerID = 0
+		self.graph.readPositions()
+		multilevelLayout(self.graph.layout, self.scene.height())
+		self.graph.writePositions()
+		self.moveItems()
+		self.scene.stability = REFINE_STABILITY
+		self.update()
+		self.stabilization()
+
+	def repackComponents(self):
+		# the components settle without forces between them, so they are packed again once still
+		self.graph.readPositions()
+		if self.graph.layout.repackComponents(self.scene.height()) > 1:
+			self.graph.writePositions()
+			self.moveItems()
+			self.update()
+
+	def layoutComponents(self):
+		# every component annealed on its own and packed; the result is final, so nothing is reheated
+		if self.timerID != 0:
+			self.killTimer(self.timerID)
+			self.timerID = 0
+		self.graph.readPositions()
+		executor = self.repulsionPool.executor if self.repulsionPool is not None else None
+		componentLayout(self.graph.layout, self.scene.height(), self.placementBox.currentData(), executor=executor)
+		self.graph.writePositions()
+		self.moveItems()
+		self.scene.stability = PLACED_STABILITY
+		self.update()
+		self.storeLayout()
+
 	def temperature(self):
 		return self.scene.height() / self.scene.stability
 
+	def barnesHutToggle(self, checked):
+		self.graph.layout.barnesHut = checked
+		if checked:
+			self.barnesHutToggleButton.setText("Exact")
+		else:
+			self.barnesHutToggleButton.setText("Approximate")
+
+	def thetaChanged(self, value):
+		self.graph.layout.theta = value
+
+	def processesChanged(self, value):
+		if self.repulsionPool is not None:
+			self.repulsionPool.close()
+		self.repulsionPool = RepulsionPool(value) if value > 0 else None
+		self.graph.layout.pool = self.repulsionPool
+
 	def hideEdgeToggle(self, checked):
 		if checked:
-			for edge in self.graph.edges:
-				edge.setVisible(False)
 			self.hideEdgeToggleButton.setText("Show edge")
 		else:
-			for edge in self.graph.edges:
-				edge.setVisible(True)
 			self.hideEdgeToggleButton.setText("Hide edge")
+		self.showGraph()
+
+	def batchRenderToggle(self, checked):
+		if checked:
+			self.batchRenderButton.setText("Item render")
+		else:
+			self.batchRenderButton.setText("Batch render")
+		self.showGraph()
+		self.moveItems()
+
+	def showGraph(self):
+		batched = self.batchRenderButton.isChecked()
+		edgesVisible = not self.hideEdgeToggleButton.isChecked()
+		for vertex in self.graph.vertices:
+			vertex.circle.setVisible(not batched)
+		for edge in self.graph.edges:
+			edge.setVisible(edgesVisible and not batched)
+		self.graphItem.graph = self.graph
+		self.graphItem.edgesVisible = edgesVisible
+		self.graphItem.setVisible(batched)
+		self.graphItem.refresh()
 
 	def readGraph(self):
 		if self.timerID != 0:
 			self.killTimer(self.timerID)
 			self.timerID = 0
+		self.storeLayout()
 		for vertex in self.graph.vertices:
 			self.scene.removeItem(vertex.circle)
 		for edge in self.graph.edges:
 			self.scene.removeItem(edge)
-		readingFile = str(self.selectBox.currentText())
-		graphData = __import__("graphData." + readingFile, 
-			globals(), locals(), ["vertexCount", "edges", "labels"], 0)
+		graphData = self.cache.open(self.selectBox.currentData(), 3)
+		self.graphKey = graphData.key
 		vertexCount = graphData.vertexCount
-		edges = graphData.edges
 		labels = graphData.labels
-		vertices = []
-		for i in range(vertexCount):
-			x = self.height() / 2 + self.height() / 5 * math.cos((i / vertexCount) * (2 * math.pi))
-			y = self.height() / 2 + self.height() / 5 * math.sin((i / vertexCount) * (2 * math.pi))
-			vertices.append(Vertex3D(x, y, 0))
+		warm = self.warmStartButton.isChecked() and graphData.positions is not None
+		if warm:
+			positions = graphData.positions
+		else:
+			positions = componentPlacement(self.placementBox.currentData(), graphData.adjacency, self.scene.height(), 3)
+		vertices = [Vertex3D(x, y, z) for (x, y, z) in positions.tolist()]
 		self.graph = Graph3D(*vertices)
-		for (vertex1, vertex2) in edges:
-			self.graph.addEdge(vertex1, vertex2)
+		self.graph.layout.pool = self.repulsionPool
+		self.graph.layout.barnesHut = self.barnesHutToggleButton.isChecked()
+		self.graph.layout.theta = self.thetaBox.value()
+		self.graph.addEdges(graphData.edges, graphData.adjacency)
+		self.graphItem.clearMarks()
+		if warm and graphData.fixed is not None:
+			self.graph.setFixed(graphData.fixed)
 		for edge in self.graph.edges:
 			self.scene.addItem(edge)
-		if self.hideEdgeToggleButton.isChecked():
-			for edge in self.graph.edges:
-				edge.setVisible(False)
 		for vertex in self.graph.vertices:
 			self.scene.addItem(vertex.circle)
+		self.showGraph()
+		self.moveItems()
 		if labels != None:
 			for (vertex, label) in zip(self.graph.vertices, labels):
 				vertex.setLabel(label)
-		self.scene.stability = 1
+		if warm:
+			self.scene.stability = WARM_STABILITY
+		elif self.placementBox.currentData() != "circle":
+			self.scene.stability = PLACED_STABILITY
+		else:
+			self.scene.stability = 1
 		self.update()
 
-	def zoomIn(self):
-		self.scene.area *= 1 + self.temperature() / self.scene.height()
+	def saveLayoutFile(self):
+		self.graph.readPositions()
+		defaultPath = os.path.splitext(self.selectBox.currentText())[0] + "3D" + LAYOUT_EXTENSION
+		(path, selected) = QFileDialog.getSaveFileName(self, "Save layout", defaultPath, "Layout (*" + LAYOUT_EXTENSION + ")")
+		if path:
+			saveLayout(path, self.graph.layout.positions, self.graph.fixedArray(), self.graphKey)
+
+	def loadLayoutFile(self):
+		(path, selected) = QFileDialog.getOpenFileName(self, "Load layout", "", "Layout (*" + LAYOUT_EXTENSION + ")")
+		if not path:
+			return
+		try:
+			layoutData = loadLayout(path)
+		except (OSError, ValueError, KeyError) as error:
+			QMessageBox.warning(self, "Load layout", str(error))
+			return
+		if not layoutData.fits(self.graph.numOfVertices(), 3):
+			QMessageBox.warning(self, "Load layout", path + " is not a 3D layout of " + str(self.graph.numOfVertices()) + " vertices")
+			return
+		if layoutData.key is not None and self.graphKey is not None and layoutData.key != self.graphKey:
+			QMessageBox.warning(self, "Load layout", path + " was saved for a different graph file")
+			return
+		if self.timerID != 0:
+			self.killTimer(self.timerID)
+			self.timerID = 0
+		self.graph.layout.positions = numpy.array(layoutData.positions, dtype=float)
+		self.graph.writePositions()
+		self.graph.setFixed(layoutData.fixed)
+		self.moveItems()
+		self.scene.stability = WARM_STABILITY
+		self.update()
+		self.stabilization()
 
-	def zoomOut(self):
-		self.scene.area *= 1 - self.temperature() / self.scene.height()
+	def profileToggle(self, checked):
+		PROFILER.enabled = checked
+		if checked:
+			PROFILER.clear()
+			self.profileButton.setText("Hide profile")
+			self.view.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
+		else:
+			self.profileButton.setText("Profile")
+			self.view.setViewportUpdateMode(QGraphicsView.MinimalViewportUpdate)
+		self.view.viewport().update()
+
+	def hudLines(self):
+		lines = [format(PROFILER.rate(), ".1f") + " it/s",
+			"frame " + format(PROFILER.mean("paint") * 1000, ".2f") + " ms",
+			"temperature " + format(self.temperature(), ".3g"),
+			"energy " + format(self.graph.layout.energy, ".3g")]
+		for (name, seconds) in PROFILER.summary()[:HUD_PHASES]:
+			lines.append(name + " " + format(seconds * 1000, ".2f") + " ms")
+		return lines
+
+	def exportTrace(self):
+		(path, selected) = QFileDialog.getSaveFileName(self, "Export trace", "trace3D.json", "Trace events (*.json)")
+		if path:
+			PROFILER.exportTrace(path)
+
+	def storeLayout(self):
+		if self.graphKey is None or self.graph.numOfVertices() == 0:
+			return
+		self.graph.readPositions()
+		self.cache.storeLayout(self.graphKey, self.graph.layout.positions, self.graph.fixedArray())
+
+	def closeEvent(self, event):
+		self.storeLayout()
+		if self.repulsionPool is not None:
+			self.repulsionPool.close()
+			self.repulsionPool = None
+		super().closeEvent(event)
 
 	def initUI(self):
 		self.exitButton = QPushButton("Exit", self)
@@ -341,15 +521,66 @@ class MainWindow3D(QWidget):
 		self.stabilizationButton = QPushButton("Stabilization", self)
 		self.stabilizationButton.clicked.connect(self.stabilization)
 
+		self.multilevelButton = QPushButton("Multilevel", self)
+		self.multilevelButton.clicked.connect(self.multilevel)
+
+		self.componentsButton = QPushButton("Components", self)
+		self.componentsButton.clicked.connect(self.layoutComponents)
+		self.componentsButton.setToolTip("Lay out every connected component on its own and pack them")
+
+		self.barnesHutToggleButton = QPushButton("Approximate", self)
+		self.barnesHutToggleButton.toggled.connect(self.barnesHutToggle)
+		self.barnesHutToggleButton.setCheckable(True)
+
+		self.thetaBox = QDoubleSpinBox(self)
+		self.thetaBox.setPrefix("theta: ")
+		self.thetaBox.setRange(0.1, 2.0)
+		self.thetaBox.setSingleStep(0.1)
+		self.thetaBox.setValue(0.8)
+		self.thetaBox.valueChanged.connect(self.thetaChanged)
+
+		self.processesBox = QSpinBox(self)
+		self.processesBox.setPrefix("processes: ")
+		self.processesBox.setSpecialValueText("serial repulsion")
+		self.processesBox.setRange(0, os.cpu_count() or 1)
+		self.processesBox.valueChanged.connect(self.processesChanged)
+
 		self.hideEdgeToggleButton = QPushButton("Hide edge", self)
 		self.hideEdgeToggleButton.toggled.connect(self.hideEdgeToggle)
 		self.hideEdgeToggleButton.setCheckable(True)
 
+		self.batchRenderButton = QPushButton("Batch render", self)
+		self.batchRenderButton.toggled.connect(self.batchRenderToggle)
+		self.batchRenderButton.setCheckable(True)
+
+		self.saveLayoutButton = QPushButton("Save layout", self)
+		self.saveLayoutButton.clicked.connect(self.saveLayoutFile)
+
+		self.loadLayoutButton = QPushButton("Load layout", self)
+		self.loadLayoutButton.clicked.connect(self.loadLayoutFile)
+
+		self.warmStartButton = QPushButton("Warm start", self)
+		self.warmStartButton.setCheckable(True)
+		self.warmStartButton.setChecked(True)
+
+		self.profileButton = QPushButton("Profile", self)
+		self.profileButton.toggled.connect(self.profileToggle)
+		self.profileButton.setCheckable(True)
+
+		self.exportTraceButton = QPushButton("Export trace", self)
+		self.exportTraceButton.clicked.connect(self.exportTrace)
+
+		self.resetViewButton = QPushButton("Reset view", self)
+		self.resetViewButton.clicked.connect(self.resetView)
+
+		self.placementBox = QComboBox(self)
+		for (name, placement) in PLACEMENT_NAMES:
+			self.placementBox.addItem(name, placement)
+		self.placementBox.setCurrentIndex(1)
+
 		self.selectBox = QComboBox(self)
-		fileList = [os.path.basename(fileName) for fileName in glob.glob("./graphData/*.py")]
-		fileList.remove("__init__.py")
-		for index, file in enumerate(fileList):
-			self.selectBox.insertItem(index, file[:-3])
+		for (index, path) in enumerate(catalog()):
+			self.selectBox.insertItem(index, catalogName(path), path)
 		self.selectBox.activated.connect(self.readGraph)
 
 		self.labelLabel = QLabel("Label:", self)
@@ -364,7 +595,20 @@ class MainWindow3D(QWidget):
 		self.toolLayout = QVBoxLayout()
 		self.toolLayout.addWidget(self.exitButton)
 		self.toolLayout.addWidget(self.stabilizationButton)
+		self.toolLayout.addWidget(self.barnesHutToggleButton)
+		self.toolLayout.addWidget(self.thetaBox)
+		self.toolLayout.addWidget(self.multilevelButton)
+		self.toolLayout.addWidget(self.componentsButton)
+		self.toolLayout.addWidget(self.processesBox)
 		self.toolLayout.addWidget(self.hideEdgeToggleButton)
+		self.toolLayout.addWidget(self.batchRenderButton)
+		self.toolLayout.addWidget(self.saveLayoutButton)
+		self.toolLayout.addWidget(self.loadLayoutButton)
+		self.toolLayout.addWidget(self.warmStartButton)
+		self.toolLayout.addWidget(self.placementBox)
+		self.toolLayout.addWidget(self.profileButton)
+		self.toolLayout.addWidget(self.exportTraceButton)
+		self.toolLayout.addWidget(self.resetViewButton)
 		self.toolLayout.addLayout(self.labelLayout)
 		self.toolLayout.addWidget(self.selectBox)
 		
@@ -377,7 +621,15 @@ class MainWindow3D(QWidget):
 		sceneRect = QRectF(self.height() / 10, self.height() / 10, self.height() / 10 * 8, self.height() / 10 * 8)
 		self.scene = QGraphicsScene(sceneRect, self)
 		self.view = MyView(self.scene, self)
+		self.view.hudLines = self.hudLines
 		self.scene.area = self.scene.width() * self.scene.height()
+		self.camera = Camera()
+		self.graphItem = GraphItem3D(self.graph, self.camera)
+		self.graphItem.setVisible(False)
+		self.scene.addItem(self.graphItem)
+		self.view.setGraphItem(self.graphItem)
+		# depth-sorted drawing is only available in the batch renderer
+		self.batchRenderButton.setChecked(True)
 		self.scene.stability = 1
 		self.setWindowTitle("visibleGraph3D")
 
@@ -387,6 +639,9 @@ class MainWindow3D(QWidget):
 		self.setLayout(self.mainLayout)
 
 		self.timerID = 0
+		self.cache = GraphCache()
+		self.graphKey = None
+		self.repulsionPool = None
 		self.readGraph()
 		self.show()
 
@@ -1,7 +1,13 @@
 #!/usr/bin/env python
 # coding: utf-8
 
-import sys
+import argparse, math, os, random, sys, numpy
+from src.graphFile import BINARY_EXTENSION, writeBinaryGraph
+
+# python -m src.makeGraphData                               types a graph in by hand
+# python -m src.makeGraphData KIND NAME [options]            generates one, e.g.
+# python -m src.makeGraphData erdos-renyi er100k -n 100000 --degree 6
+GEOMETRIC_OFFSETS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
 
 def hasOverlapping(*lst):
 	uniqueList = []
@@ -12,7 +18,144 @@ def hasOverlapping(*lst):
 			uniqueList.append(content)
 	return False
 
-if __name__ == "__main__":
+def uniqueEdges(edges, vertexCount):
+	# drops self loops and duplicates, every edge is kept as (smaller, larger)
+	edges = numpy.sort(numpy.asarray(edges, dtype=numpy.int64).reshape(-1, 2), axis=1)
+	edges = edges[edges[:, 0] != edges[:, 1]]
+	keys = numpy.unique(edges[:, 0] * vertexCount + edges[:, 1])
+	return numpy.stack((keys // vertexCount, keys % vertexCount), axis=1)
+
+def erdosRenyi(vertexCount, edgeCount, rng):
+	# G(n, m): uniform pairs, redrawn until there are edgeCount distinct ones
+	edgeCount = min(edgeCount, vertexCount * (vertexCount - 1) // 2)
+	edges = numpy.zeros((0, 2), dtype=numpy.int64)
+	while len(edges) < edgeCount:
+		missing = edgeCount - len(edges)
+		drawn = rng.randint(0, vertexCount, (missing + missing // 8 + 16, 2))
+		edges = uniqueEdges(numpy.concatenate((edges, drawn)), vertexCount)
+	return edges[rng.permutation(len(edges))[:edgeCount]]
+
+def grid(rows, columns, torus=False):
+	indices = numpy.arange(rows * columns).reshape(rows, columns)
+	right = numpy.stack((indices[:, :-1].ravel(), indices[:, 1:].ravel()), axis=1)
+	down = numpy.stack((indices[:-1, :].ravel(), indices[1:, :].ravel()), axis=1)
+	edges = [right, down]
+	if torus and columns > 2:
+		edges.append(numpy.stack((indices[:, -1], indices[:, 0]), axis=1))
+	if torus and rows > 2:
+		edges.append(numpy.stack((indices[-1, :], indices[0, :]), axis=1))
+	return numpy.concatenate(edges)
+
+def randomGeometric(vertexCount, radius, rng):
+	# points in the unit square joined when closer than radius, compared cell by cell
+	points = rng.random_sample((vertexCount, 2))
+	cellCount = max(int(1 / radius), 1)
+	cells = numpy.minimum((points * cellCount).astype(numpy.int64), cellCount - 1)
+	keys = cells[:, 0] * cellCount + cells[:, 1]
+	order = numpy.argsort(keys, kind="stable")
+	sortedKeys = keys[order]
+	edges = []
+	for (dx, dy) in GEOMETRIC_OFFSETS:
+		other = cells + (dx, dy)
+		valid = numpy.all((other >= 0) & (other < cellCount), axis=1)
+		otherKeys = other[:, 0] * cellCount + other[:, 1]
+		starts = numpy.searchsorted(sortedKeys, otherKeys, "left")
+		counts = numpy.where(valid, numpy.searchsorted(sortedKeys, otherKeys, "right") - starts, 0)
+		first = numpy.repeat(numpy.arange(vertexCount), counts)
+		second = order[numpy.repeat(starts - numpy.cumsum(counts) + counts, counts) + numpy.arange(counts.sum())]
+		if (dx, dy) == (0, 0):
+			keep = first < second
+			(first, second) = (first[keep], second[keep])
+		diff = points[first] - points[second]
+		near = numpy.einsum("ij,ij->i", diff, diff) < pow(radius, 2)
+		edges.append(numpy.stack((first[near], second[near]), axis=1))
+	return numpy.concatenate(edges)
+
+def preferentialAttachment(vertexCount, degree, seed):
+	# Batagelj-Brandes: every new edge picks its old end proportionally to degree
+	generator = random.Random(seed)
+	ends = [0] * (2 * vertexCount * degree)
+	for vertex in range(vertexCount):
+		for slot in range(vertex * degree, (vertex + 1) * degree):
+			ends[2 * slot] = vertex
+			ends[2 * slot + 1] = ends[generator.randrange(2 * slot + 1)]
+	return uniqueEdges(numpy.array(ends).reshape(-1, 2), vertexCount)
+
+def tree(vertexCount, branching, rng):
+	# complete branching-ary tree, or a uniformly random recursive tree when branching is 0
+	children = numpy.arange(1, vertexCount)
+	if branching > 0:
+		parents = (children - 1) // branching
+	else:
+		parents = (rng.random_sample(len(children)) * children).astype(numpy.int64)
+	return numpy.stack((parents, children), axis=1)
+
+def writeModuleGraph(path, vertexCount, edges):
+	with open(path, "w", encoding="utf-8") as file:
+		file.write("# coding: utf-8\n\nvertexCount = " + str(vertexCount) + "\n\nedges = [\n")
+		numpy.savetxt(file, numpy.asarray(edges).reshape(-1, 2), fmt="\t(%d, %d),")
+		file.write("]\n\nlabels = None\n")
+
+def generate(arguments):
+	rng = numpy.random.RandomState(arguments.seed)
+	if arguments.kind == "grid":
+		columns = arguments.columns or arguments.rows
+		return (arguments.rows * columns, grid(arguments.rows, columns, arguments.torus))
+	vertexCount = arguments.vertices
+	if arguments.kind == "erdos-renyi":
+		edgeCount = arguments.edges
+		if edgeCount is None:
+			edgeCount = int(round(vertexCount * arguments.degree / 2))
+		return (vertexCount, erdosRenyi(vertexCount, edgeCount, rng))
+	if arguments.kind == "geometric":
+		radius = arguments.radius
+		if radius is None:
+			radius = math.sqrt(arguments.degree / (vertexCount * math.pi))
+		return (vertexCount, randomGeometric(vertexCount, radius, rng))
+	if arguments.kind == "preferential":
+		return (vertexCount, preferentialAttachment(vertexCount, arguments.attach, arguments.seed))
+	return (vertexCount, tree(vertexCount, arguments.branching, rng))
+
+def parseArguments(argv):
+	parser = argparse.ArgumentParser(description="generate synthetic graphs into graphData")
+	kinds = parser.add_subparsers(dest="kind", required=True)
+	common = argparse.ArgumentParser(add_help=False)
+	common.add_argument("name", help="output file name without extension")
+	common.add_argument("-o", "--output", default="./graphData", help="output directory")
+	common.add_argument("-f", "--format", choices=("vgb", "py"), default="vgb", help="binary graph file or python module")
+	common.add_argument("--seed", type=int, default=0)
+	sized = argparse.ArgumentParser(add_help=False)
+	sized.add_argument("-n", "--vertices", type=int, required=True)
+	kind = kinds.add_parser("erdos-renyi", parents=[common, sized], help="uniformly random edges")
+	kind.add_argument("-m", "--edges", type=int, default=None, help="edge count (default: vertices * degree / 2)")
+	kind.add_argument("-d", "--degree", type=float, default=4, help="mean degree")
+	kind = kinds.add_parser("grid", parents=[common], help="rows x columns lattice")
+	kind.add_argument("--rows", type=int, required=True)
+	kind.add_argument("--columns", type=int, default=None, help="(default: rows)")
+	kind.add_argument("--torus", action="store_true", help="wrap around both axes")
+	kind = kinds.add_parser("geometric", parents=[common, sized], help="random points joined within a radius")
+	kind.add_argument("-r", "--radius", type=float, default=None, help="in the unit square (default: from degree)")
+	kind.add_argument("-d", "--degree", type=float, default=6, help="expected mean degree")
+	kind = kinds.add_parser("preferential", parents=[common, sized], help="Barabasi-Albert preferential attachment")
+	kind.add_argument("-m", "--attach", type=int, default=2, help="edges brought in by each vertex")
+	kind = kinds.add_parser("tree", parents=[common, sized], help="random recursive or complete tree")
+	kind.add_argument("-b", "--branching", type=int, default=0, help="children per vertex, 0 for a random tree")
+	return parser.parse_args(argv)
+
+def main(argv):
+	arguments = parseArguments(argv)
+	(vertexCount, edges) = generate(arguments)
+	os.makedirs(arguments.output, exist_ok=True)
+	if arguments.format == "vgb":
+		path = os.path.join(arguments.output, arguments.name + BINARY_EXTENSION)
+		writeBinaryGraph(path, vertexCount, edges)
+	else:
+		path = os.path.join(arguments.output, arguments.name + ".py")
+		writeModuleGraph(path, vertexCount, edges)
+	print(path + ": " + str(vertexCount) + " vertices, " + str(len(edges)) + " edges")
+	return 0
+
+def interactive():
 	fileName = input("type fileName removed \".py\" --> ")
 	while True:
 		allowToClear = input("Is it OK to clear this file?  y / n : ").strip()
@@ -35,9 +178,6 @@ if __name__ == "__main__":
 		if int(vertexCount) <= 0:
 			print("must type a positive number")
 			continue
-		if int(vertexCount) > 100:
-			print("must type a number of 100 or less")
-			continue
 		break
 	writeStrings.append("vertexCount = " + vertexCount + "\n")
 	writeStrings.append("\n")
@@ -85,4 +225,7 @@ if __name__ == "__main__":
 		file.write("\n")
 		file.close()
 
-
+if __name__ == "__main__":
+	if len(sys.argv) > 1:
+		sys.exit(main(sys.argv[1:]))
+	interactive()
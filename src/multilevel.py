@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import numpy
+from src.adjacency import Adjacency
+from src.layout import Layout, circlePositions, anneal
+
+MIN_SIZE = 32
+MATCHING_ROUNDS = 4
+REFINE_STABILITY = 8
+
+def matching(adjacency, rng):
+	# handshake matching: every unmatched vertex points at a random unmatched neighbor, mutual pairs are merged
+	vertexCount = adjacency.numOfVertices()
+	partner = numpy.arange(vertexCount)
+	rows = adjacency.rows()
+	neighbors = adjacency.neighbors
+	for matchingRound in range(MATCHING_ROUNDS):
+		unmatched = partner == numpy.arange(vertexCount)
+		valid = unmatched[rows] & unmatched[neighbors] & (rows != neighbors)
+		if not numpy.any(valid):
+			break
+		keys = rng.random_sample(len(neighbors))
+		order = numpy.lexsort((keys, ~valid, rows))
+		(candidateRows, first) = numpy.unique(rows[order], return_index=True)
+		chosen = order[first]
+		choice = numpy.full(vertexCount, -1)
+		choice[candidateRows[valid[chosen]]] = neighbors[chosen[valid[chosen]]]
+		proposers = numpy.nonzero(choice >= 0)[0]
+		mutual = proposers[choice[choice[proposers]] == proposers]
+		partner[mutual] = choice[mutual]
+	return partner
+
+def coarsen(adjacency, rng):
+	partner = matching(adjacency, rng)
+	(representatives, labels) = numpy.unique(numpy.minimum(numpy.arange(len(partner)), partner), return_inverse=True)
+	sources = labels[adjacency.sources]
+	targets = labels[adjacency.targets]
+	keep = sources != targets
+	pairs = numpy.unique(numpy.sort(numpy.stack((sources[keep], targets[keep]), axis=1), axis=1), axis=0)
+	return (Adjacency(len(representatives), pairs), labels.reshape(-1))
+
+def hierarchy(adjacency, minSize=MIN_SIZE, rng=numpy.random):
+	levels = [(adjacency, None)]
+	while adjacency.numOfVertices() > minSize:
+		(coarse, labels) = coarsen(adjacency, rng)
+		if coarse.numOfVertices() > adjacency.numOfVertices() * 3 / 4 or coarse.numOfEdges() == 0:
+			break
+		levels.append((coarse, labels))
+		adjacency = coarse
+	return levels
+
+def multilevelLayout(layout, size=640, iterations=None, minSize=MIN_SIZE, rng=numpy.random):
+	if iterations is None:
+		iterations = int(size)
+	levels = hierarchy(layout.currentAdjacency(), minSize, rng)
+	(coarsest, labels) = levels[-1]
+	positions = circlePositions(coarsest.numOfVertices(), size * 5 / 8, size / 4, layout.dimension)
+	firstStability = 1
+	levelIterations = iterations
+	for level in range(len(levels) - 1, -1, -1):
+		(adjacency, labels) = levels[level]
+		if level == 0:
+			current = layout
+			fixed = ~layout.movable
+			original = layout.positions[fixed]
+			layout.positions = positions
+			layout.positions[fixed] = original
+		else:
+			current = Layout(adjacency.numOfVertices(), adjacency.edgeList(), layout.dimension)
+			current.positions = positions
+			current.barnesHut = layout.barnesHut
+			current.theta = layout.theta
+			current.rng = layout.rng
+			current.pool = layout.pool
+		anneal(current, size, levelIterations, None, firstStability)
+		if labels is not None:
+			spread = size / 8 / numpy.sqrt(len(labels))
+			positions = current.positions[labels] + (rng.random_sample((len(labels), layout.dimension)) - 0.5) * spread
+		firstStability = REFINE_STABILITY
+		levelIterations = max(iterations // 4, 1)
+	return len(levels)
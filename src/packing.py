@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import math, numpy
+
+def packComponents(parts, vertexCount, size, dimension=2):
+	# shelf packing of the components' bounding rectangles, tallest first, into a roughly square strip,
+	# shrunk to fit the scene when needed; in 3D every component keeps its depth centered on the scene
+	gap = size / math.sqrt(vertexCount) / 2
+	lowers = numpy.array([positions.min(axis=0) for (vertices, positions) in parts])
+	uppers = numpy.array([positions.max(axis=0) for (vertices, positions) in parts])
+	extents = uppers[:, 0:2] - lowers[:, 0:2] + gap
+	width = max(math.sqrt(numpy.prod(extents, axis=1).sum()), extents[:, 0].max())
+	offsets = numpy.zeros((len(parts), 2))
+	(x, y, shelfHeight) = (0, 0, 0)
+	for index in numpy.argsort(-extents[:, 1], kind="stable").tolist():
+		if x > 0 and x + extents[index, 0] > width:
+			(x, y, shelfHeight) = (0, y + shelfHeight, 0)
+		offsets[index] = (x, y)
+		x += extents[index, 0]
+		shelfHeight = max(shelfHeight, extents[index, 1])
+	packed = numpy.zeros((vertexCount, dimension))
+	for ((vertices, positions), lower, upper, offset) in zip(parts, lowers, uppers, offsets):
+		packed[vertices, 0:2] = positions[:, 0:2] - lower[0:2] + offset
+		if dimension == 3:
+			packed[vertices, 2] = positions[:, 2] - (lower[2] + upper[2]) / 2
+	packedExtent = (offsets + extents).max(axis=0) - gap
+	scale = min(1, size / packedExtent.max()) if packedExtent.max() > 0 else 1
+	packed[:, 0:2] -= packedExtent / 2
+	return size * 5 / 8 + packed * scale
+
+def keepPinned(positions, labels, count, fixed, original):
+	# a component with fixed vertices is moved by their mean offset, and the fixed vertices stay where they were
+	if not len(original):
+		return
+	pinned = numpy.bincount(labels[fixed], minlength=count)
+	offset = original - positions[fixed]
+	shift = numpy.stack([numpy.bincount(labels[fixed], offset[:, axis], count) for axis in range(positions.shape[1])], axis=1)
+	positions += (shift / numpy.maximum(pinned, 1)[:, None])[labels]
+	positions[fixed] = original
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+import os, numpy
+from src.forceKernel import JITTER_SEEDS, blockCount, blockSize, repulsiveBlocks, repulsiveDisplacement
+
+# below this many vertices a round trip to the pool costs more than the serial kernel
+MIN_PARALLEL_SIZE = 1024
+
+# shared buffers the worker process has attached, by name
+attached = {}
+
+def attach(name, shape):
+	if name not in attached:
+		attached[name] = shared_memory.SharedMemory(name=name)
+	return numpy.ndarray(shape, dtype=float, buffer=attached[name].buf)
+
+def repulsionTile(task):
+	# runs in a worker: reads positions from shared memory and writes its slice of the displacement back
+	(names, count, dimension, kValue, seed, first, last) = task
+	for name in [name for name in attached if name not in names]:
+		attached.pop(name).close()
+	positions = attach(names[0], (count, dimension))
+	disp = attach(names[1], (count, dimension))
+	colors = None
+	if names[2] is not None:
+		colors = attach(names[2], (count, 3))
+	repulsiveBlocks(positions, kValue, colors, numpy.arange(count), seed, range(first, last), disp)
+	return last - first
+
+class RepulsionPool(object):
+	# worker processes sharing the exact repulsion by tiles of whole kernel blocks;
+	# only the tile bounds are pickled, positions and displacements stay in shared memory
+	def __init__(self, workers=None):
+		self.workers = workers or os.cpu_count()
+		self.minSize = MIN_PARALLEL_SIZE
+		# spawned workers do not inherit the GUI's Qt state
+		self.executor = ProcessPoolExecutor(self.workers, mp_context=get_context("spawn"))
+		self.buffers = {}
+
+	def buffer(self, role, shape):
+		# grows the shared buffer for role when needed; workers drop the old one on their next tile
+		size = max(int(numpy.prod(shape)) * 8, 1)
+		memory = self.buffers.get(role)
+		if memory is None or memory.size < size:
+			if memory is not None:
+				memory.close()
+				memory.unlink()
+			memory = shared_memory.SharedMemory(create=True, size=size)
+			self.buffers[role] = memory
+		return numpy.ndarray(shape, dtype=float, buffer=memory.buf)
+
+	def repulsiveDisplacement(self, positions, kValue, colors=None, rng=None):
+		(count, dimension) = positions.shape
+		if count < self.minSize:
+			return repulsiveDisplacement(positions, kValue, colors, rng)
+		if rng is None:
+			rng = numpy.random
+		seed = rng.randint(JITTER_SEEDS)
+		numpy.copyto(self.buffer("positions", (count, dimension)), positions)
+		disp = self.buffer("disp", (count, dimension))
+		colorName = None
+		if colors is not None:
+			numpy.copyto(self.buffer("colors", (count, 3)), colors)
+			colorName = self.buffers["colors"].name
+		names = (self.buffers["positions"].name, self.buffers["disp"].name, colorName)
+		blocks = blockCount(count, blockSize(count, dimension))
+		bounds = numpy.linspace(0, blocks, min(self.workers, blocks) + 1).astype(int).tolist()
+		tasks = [(names, count, dimension, kValue, seed, first, last) for (first, last) in zip(bounds[:-1], bounds[1:]) if last > first]
+		for done in self.executor.map(repulsionTile, tasks):
+			pass
+		return disp.copy()
+
+	def close(self):
+		self.executor.shutdown()
+		for memory in self.buffers.values():
+			memory.close()
+			memory.unlink()
+		self.buffers = {}
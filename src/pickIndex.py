@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import numpy
+
+class PickIndex(object):
+	# uniform grid over projected screen points; the points are sorted by cell key once per build,
+	# so every row of cells a query covers is found with two binary searches
+	SLACK = 1
+
+	def __init__(self, points, radii):
+		self.points = numpy.asarray(points, dtype=float).reshape(-1, 2)
+		self.radii = numpy.broadcast_to(numpy.asarray(radii, dtype=float), (len(self.points),))
+		self.reach = (self.radii.max() if len(self.points) else 0) + self.SLACK
+		self.cellSize = self.reach * 2
+		if len(self.points) == 0:
+			self.origin = numpy.zeros(2)
+			self.shape = numpy.zeros(2, dtype=numpy.int64)
+			self.order = numpy.zeros(0, dtype=numpy.int64)
+			self.keys = numpy.zeros(0, dtype=numpy.int64)
+			return
+		self.origin = self.points.min(axis=0)
+		cells = ((self.points - self.origin) // self.cellSize).astype(numpy.int64)
+		# (columns, rows)
+		self.shape = cells.max(axis=0) + 1
+		keys = cells[:, 1] * self.shape[0] + cells[:, 0]
+		self.order = numpy.argsort(keys, kind="stable")
+		self.keys = keys[self.order]
+
+	def numOfPoints(self):
+		return len(self.points)
+
+	def inRect(self, left, top, right, bottom):
+		# indices of the points inside the rectangle
+		lower = numpy.maximum(numpy.floor((numpy.array((left, top)) - self.origin) / self.cellSize), 0).astype(numpy.int64)
+		upper = numpy.minimum(numpy.floor((numpy.array((right, bottom)) - self.origin) / self.cellSize), self.shape - 1).astype(numpy.int64)
+		if len(self.points) == 0 or numpy.any(upper < lower):
+			return numpy.zeros(0, dtype=numpy.int64)
+		rows = numpy.arange(lower[1], upper[1] + 1) * self.shape[0]
+		starts = numpy.searchsorted(self.keys, rows + lower[0], "left")
+		counts = numpy.searchsorted(self.keys, rows + upper[0], "right") - starts
+		candidates = self.order[numpy.repeat(starts - numpy.cumsum(counts) + counts, counts) + numpy.arange(counts.sum())]
+		points = self.points[candidates]
+		inside = (points[:, 0] >= left) & (points[:, 0] <= right) & (points[:, 1] >= top) & (points[:, 1] <= bottom)
+		return candidates[inside]
+
+	def nearest(self, x, y):
+		# the closest point whose radius plus SLACK reaches (x, y), or None
+		candidates = self.inRect(x - self.reach, y - self.reach, x + self.reach, y + self.reach)
+		distances = numpy.hypot(self.points[candidates, 0] - x, self.points[candidates, 1] - y)
+		hits = distances <= self.radii[candidates] + self.SLACK
+		if not hits.any():
+			return None
+		return int(candidates[hits][numpy.argmin(distances[hits])])
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import numpy
+from src.layout import circlePositions
+
+PLACEMENTS = ("circle", "pivotMds", "spectral")
+PIVOTS = 32
+SPECTRAL_ITERATIONS = 300
+SPECTRAL_TOLERANCE = 1e-7
+# a placed layout starts annealing this cool, so the first hot steps do not throw it away
+PLACED_STABILITY = 256
+
+def gatherNeighbors(adjacency, vertices):
+	degrees = adjacency.offsets[vertices + 1] - adjacency.offsets[vertices]
+	starts = adjacency.offsets[vertices]
+	return adjacency.neighbors[numpy.repeat(starts - numpy.cumsum(degrees) + degrees, degrees) + numpy.arange(degrees.sum())]
+
+def bfsDistances(adjacency, source):
+	# hop counts from source, -1 where it is unreachable
+	distances = numpy.full(adjacency.numOfVertices(), -1, dtype=numpy.int64)
+	distances[source] = 0
+	frontier = numpy.array([source])
+	hop = 0
+	while len(frontier):
+		hop += 1
+		reached = numpy.unique(gatherNeighbors(adjacency, frontier))
+		frontier = reached[distances[reached] < 0]
+		distances[frontier] = hop
+	return distances
+
+def pivotMds(adjacency, dimension, pivots=PIVOTS, rng=numpy.random):
+	# Brandes and Pich: classical MDS on the distances to a few max-min spread pivots only
+	vertexCount = adjacency.numOfVertices()
+	pivots = min(pivots, vertexCount)
+	columns = numpy.zeros((vertexCount, pivots))
+	nearest = numpy.full(vertexCount, numpy.inf)
+	pivot = rng.randint(vertexCount)
+	for column in range(pivots):
+		distances = bfsDistances(adjacency, pivot).astype(float)
+		# other components are put one hop beyond the farthest reachable vertex
+		distances[distances < 0] = distances.max() + 1
+		columns[:, column] = distances
+		nearest = numpy.minimum(nearest, distances)
+		pivot = int(numpy.argmax(nearest))
+	squared = pow(columns, 2)
+	centered = (squared - squared.mean(axis=0) - squared.mean(axis=1)[:, None] + squared.mean()) * -0.5
+	(values, vectors) = numpy.linalg.eigh(centered.T @ centered)
+	top = numpy.argsort(values)[::-1][:dimension]
+	coordinates = numpy.zeros((vertexCount, dimension))
+	coordinates[:, :len(top)] = centered @ vectors[:, top]
+	return coordinates
+
+def neighborSums(adjacency, values, rows):
+	return numpy.stack([numpy.bincount(rows, values[adjacency.neighbors, axis], adjacency.numOfVertices())
+		for axis in range(values.shape[1])], axis=1)
+
+def degreeOrthonormalize(vectors, weights):
+	# Gram-Schmidt in the degree-weighted inner product, starting from the constant vector
+	basis = [numpy.ones(len(weights)) / numpy.sqrt(weights.sum())]
+	for axis in range(vectors.shape[1]):
+		vector = vectors[:, axis]
+		for other in basis:
+			vector = vector - numpy.dot(vector * weights, other) * other
+		vectors[:, axis] = vector / max(numpy.sqrt(numpy.dot(vector * weights, vector)), 1e-300)
+		basis.append(vectors[:, axis])
+	return vectors
+
+def spectralEmbedding(adjacency, dimension, iterations=SPECTRAL_ITERATIONS, rng=numpy.random):
+	# Koren's degree-normalized Laplacian eigenvectors: block power iteration on (I + D^-1 A) / 2
+	# with the sparse adjacency, D-orthogonal to the constant vector and to each other
+	rows = adjacency.rows()
+	weights = numpy.maximum(adjacency.degrees(), 1).astype(float)
+	vectors = degreeOrthonormalize(rng.random_sample((adjacency.numOfVertices(), dimension)) - 0.5, weights)
+	for iteration in range(iterations):
+		previous = vectors
+		vectors = degreeOrthonormalize((vectors + neighborSums(adjacency, vectors, rows) / weights[:, None]) / 2, weights)
+		if numpy.abs(numpy.einsum("ij,ij->j", vectors * weights[:, None], previous)).min() > 1 - SPECTRAL_TOLERANCE:
+			break
+	return vectors
+
+def fitPositions(coordinates, center, radius, rng=numpy.random):
+	# centers the embedding on center, scales its farthest vertex to radius and jitters coincident vertices apart
+	(vertexCount, dimension) = coordinates.shape
+	coordinates = coordinates - coordinates.mean(axis=0)
+	extent = numpy.sqrt(numpy.einsum("ij,ij->i", coordinates, coordinates).max())
+	if extent == 0:
+		return circlePositions(vertexCount, center, radius, dimension)
+	jitter = (rng.random_sample((vertexCount, dimension)) - 0.5) * radius / numpy.sqrt(vertexCount) / 4
+	return center + coordinates * (radius / extent) + jitter
+
+def initialPositions(placement, adjacency, center, radius, dimension=2, rng=numpy.random):
+	vertexCount = adjacency.numOfVertices()
+	if placement == "circle" or vertexCount < 3:
+		return circlePositions(vertexCount, center, radius, dimension)
+	if placement == "pivotMds":
+		coordinates = pivotMds(adjacency, dimension, rng=rng)
+	else:
+		coordinates = spectralEmbedding(adjacency, dimension, rng=rng)
+	return fitPositions(coordinates, center, radius, rng)
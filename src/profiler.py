@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import collections, contextlib, json, os, threading, time
+
+TRACE_CAPACITY = 200000
+RATE_WINDOW = 60
+NULL_PHASE = contextlib.nullcontext()
+
+class Phase(object):
+	def __init__(self, profiler, name):
+		self.profiler = profiler
+		self.name = name
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, kind, value, traceback):
+		self.profiler.record(self.name, self.start, time.perf_counter())
+		return False
+
+class Profiler(object):
+	# keeps the latest phase durations as trace events; while disabled a phase costs one attribute check
+	def __init__(self, capacity=TRACE_CAPACITY):
+		self.enabled = False
+		self.origin = time.perf_counter()
+		self.events = collections.deque(maxlen=capacity)
+		self.durations = collections.defaultdict(lambda: collections.deque(maxlen=RATE_WINDOW))
+		self.ticks = collections.deque(maxlen=RATE_WINDOW)
+		self.counters = {}
+
+	def phase(self, name):
+		if not self.enabled:
+			return NULL_PHASE
+		return Phase(self, name)
+
+	def timestamp(self, moment):
+		return (moment - self.origin) * 1e6
+
+	def record(self, name, start, stop):
+		self.durations[name].append(stop - start)
+		self.events.append({"name": name, "ph": "X", "ts": self.timestamp(start), "dur": (stop - start) * 1e6,
+			"pid": os.getpid(), "tid": threading.get_ident()})
+
+	def counter(self, name, value):
+		if not self.enabled:
+			return
+		self.counters[name] = value
+		self.events.append({"name": name, "ph": "C", "ts": self.timestamp(time.perf_counter()),
+			"pid": os.getpid(), "args": {name: float(value)}})
+
+	def tick(self):
+		if self.enabled:
+			self.ticks.append(time.perf_counter())
+
+	def rate(self):
+		if len(self.ticks) < 2:
+			return 0.0
+		return (len(self.ticks) - 1) / max(self.ticks[-1] - self.ticks[0], 1e-9)
+
+	def mean(self, name):
+		durations = self.durations.get(name)
+		if not durations:
+			return 0.0
+		return sum(durations) / len(durations)
+
+	def summary(self):
+		# (phase, mean seconds) of the recent ticks, slowest first
+		return sorted(((name, self.mean(name)) for name in list(self.durations)), key=lambda item: -item[1])
+
+	def clear(self):
+		self.events.clear()
+		self.durations.clear()
+		self.ticks.clear()
+		self.counters = {}
+
+	def exportTrace(self, path):
+		# chrome trace event format, readable by chrome://tracing and Perfetto
+		with open(path, "w", encoding="utf-8") as file:
+			json.dump({"traceEvents": list(self.events), "displayTimeUnit": "ms"}, file)
+
+PROFILER = Profiler()
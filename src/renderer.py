@@ -0,0 +1,320 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+from PyQt5.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem, QRubberBand
+from PyQt5.QtCore import Qt, QRectF, QPointF, QRect, QSize
+from PyQt5.QtGui import QPolygonF, QPen, QColor
+import numpy
+from src.pickIndex import PickIndex
+
+def pointPolygon(points):
+	# fills a QPolygonF straight from a (n, 2) float array without building QPointF objects
+	polygon = QPolygonF(len(points))
+	if len(points):
+		buffer = polygon.data()
+		buffer.setsize(len(points) * 2 * 8)
+		numpy.frombuffer(buffer, dtype=float).reshape(-1, 2)[:] = points
+	return polygon
+
+def visibleMask(positions, rect, margin):
+	return ((positions[:, 0] >= rect.left() - margin) & (positions[:, 0] <= rect.right() + margin)
+		& (positions[:, 1] >= rect.top() - margin) & (positions[:, 1] <= rect.bottom() + margin))
+
+def paintHud(painter, lines):
+	# draws text lines at the top left of the viewport whatever the view transform is
+	painter.save()
+	painter.resetTransform()
+	metrics = painter.fontMetrics()
+	width = max(metrics.width(line) for line in lines) + 8
+	painter.fillRect(QRectF(0, 0, width, metrics.height() * len(lines) + 8), QColor(255, 255, 255, 208))
+	painter.setPen(QPen(Qt.black))
+	for (row, line) in enumerate(lines):
+		painter.drawText(QPointF(4, 4 + metrics.ascent() + metrics.height() * row), line)
+	painter.restore()
+
+class SelectionBand(object):
+	# rubber band over a view that selects the graph item's vertices it covers when released
+	def __init__(self, view, graphItem):
+		self.view = view
+		self.graphItem = graphItem
+		self.band = QRubberBand(QRubberBand.Rectangle, view.viewport())
+		self.origin = None
+
+	def isActive(self):
+		return self.origin is not None
+
+	def start(self, pos):
+		self.origin = pos
+		self.band.setGeometry(QRect(pos, QSize()))
+		self.band.show()
+
+	def drag(self, pos):
+		self.band.setGeometry(QRect(self.origin, pos).normalized())
+
+	def finish(self, pos, extend=False):
+		self.band.hide()
+		rect = self.view.mapToScene(QRect(self.origin, pos).normalized()).boundingRect()
+		self.origin = None
+		self.graphItem.select(rect, extend)
+		self.view.viewport().update()
+
+class GraphItem(QGraphicsItem):
+	RADIUS = 5
+	FIX_SIGN = 8
+	# level-of-detail thresholds in device pixels
+	DOT_RADIUS = 1.5
+	OUTLINE_RADIUS = 3
+	FIX_SIGN_SIZE = 3
+	EDGE_LENGTH = 1
+	# vertex fills are drawn one bulk call per color; past COLOR_LEVELS cubed distinct colors
+	# they are bucketed by COLOR_LEVELS levels per channel and drawn in the mean color of the bucket
+	COLOR_LEVELS = 8
+	SELECTION_COLOR = QColor(0, 120, 255, 96)
+	HOVER_COLOR = QColor(255, 140, 0)
+
+	def __init__(self, graph):
+		super().__init__()
+		self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+		self.graph = graph
+		self.edgesVisible = True
+		self.rect = QRectF()
+		self.grabbed = None
+		# built on the first query after a frame, also serves the item renderer
+		self.index = None
+		self.hovered = None
+		self.selection = numpy.zeros(0, dtype=numpy.int64)
+
+	def positions(self):
+		return self.graph.layout.positions[:, 0:2]
+
+	def margin(self):
+		return self.FIX_SIGN + 1
+
+	def refresh(self):
+		self.index = None
+		positions = self.positions()
+		self.prepareGeometryChange()
+		if len(positions):
+			(lower, upper) = (positions.min(axis=0), positions.max(axis=0))
+			margin = self.margin()
+			self.rect = QRectF(lower[0] - margin, lower[1] - margin, upper[0] - lower[0] + margin * 2, upper[1] - lower[1] + margin * 2)
+		else:
+			self.rect = QRectF()
+		self.update()
+
+	def boundingRect(self):
+		return self.rect
+
+	def paint(self, painter, option, widget):
+		positions = self.positions()
+		scale = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+		if self.edgesVisible:
+			self.paintEdges(painter, positions, option.exposedRect, scale)
+		self.paintVertices(painter, positions, option.exposedRect, scale)
+
+	def edgeMask(self, first, second, rect, scale):
+		# edges crossing the exposed rect and at least EDGE_LENGTH device pixels long
+		lower = numpy.minimum(first, second)
+		upper = numpy.maximum(first, second)
+		inView = ((upper[:, 0] >= rect.left()) & (lower[:, 0] <= rect.right())
+			& (upper[:, 1] >= rect.top()) & (lower[:, 1] <= rect.bottom()))
+		diff = first - second
+		return inView & (numpy.einsum("ij,ij->i", diff, diff) * pow(scale, 2) >= pow(self.EDGE_LENGTH, 2))
+
+	def paintEdges(self, painter, positions, rect, scale):
+		adjacency = self.graph.layout.currentAdjacency()
+		first = positions[adjacency.sources]
+		second = positions[adjacency.targets]
+		inView = self.edgeMask(first, second, rect, scale)
+		ends = numpy.stack((first[inView], second[inView]), axis=1).reshape(-1, 2)
+		painter.setPen(QPen(Qt.black))
+		painter.drawLines(pointPolygon(ends))
+
+	def paintDots(self, painter, positions, width, color=Qt.black):
+		pen = QPen(color)
+		pen.setCapStyle(Qt.RoundCap)
+		pen.setWidthF(width)
+		painter.setPen(pen)
+		painter.drawPoints(pointPolygon(positions))
+
+	def paintVertices(self, painter, positions, rect, scale):
+		visible = visibleMask(positions, rect, self.FIX_SIGN)
+		if self.RADIUS * scale < self.DOT_RADIUS:
+			self.paintDots(painter, positions[visible], self.RADIUS * 2)
+			return
+		indices = numpy.nonzero(visible)[0]
+		fillWidth = self.RADIUS * 2
+		if self.RADIUS * scale >= self.OUTLINE_RADIUS:
+			# a black disk one pen width wider under every fill stands in for the outline
+			self.paintDots(painter, positions[indices], self.RADIUS * 2 + 1)
+			fillWidth = self.RADIUS * 2 - 1
+		self.paintFills(painter, positions, indices, fillWidth)
+		if self.FIX_SIGN * scale < self.FIX_SIGN_SIZE:
+			return
+		painter.setPen(QPen(Qt.black))
+		fixed = positions[indices[self.graph.layout.fixed[indices]]]
+		if len(fixed):
+			corners = numpy.array([(-1, -1), (1, 1), (1, -1), (-1, 1)]) * self.FIX_SIGN
+			crosses = (fixed[:, None, :] + corners[None, :, :]).reshape(-1, 2)
+			painter.drawLines(pointPolygon(crosses))
+
+	def paintFills(self, painter, positions, indices, width):
+		colors = self.graph.colorVectors[indices]
+		channels = colors.astype(numpy.int64)
+		keys = (channels[:, 0] * 256 + channels[:, 1]) * 256 + channels[:, 2]
+		(buckets, inverse, counts) = numpy.unique(keys, return_inverse=True, return_counts=True)
+		if len(buckets) > pow(self.COLOR_LEVELS, 3):
+			levels = channels * self.COLOR_LEVELS // 256
+			keys = (levels[:, 0] * self.COLOR_LEVELS + levels[:, 1]) * self.COLOR_LEVELS + levels[:, 2]
+			(buckets, inverse, counts) = numpy.unique(keys, return_inverse=True, return_counts=True)
+		inverse = inverse.reshape(-1)
+		means = numpy.stack([numpy.bincount(inverse, colors[:, axis], len(buckets)) for axis in range(3)], axis=1) / counts[:, None]
+		order = numpy.argsort(inverse, kind="stable")
+		bounds = numpy.concatenate(([0], numpy.cumsum(counts)))
+		for (bucket, (red, green, blue)) in enumerate(means.astype(int).tolist()):
+			members = indices[order[bounds[bucket]:bounds[bucket + 1]]]
+			self.paintDots(painter, positions[members], width, QColor(red, green, blue))
+
+	def pickRadii(self):
+		return self.RADIUS
+
+	def pickIndex(self):
+		if self.index is None:
+			positions = self.positions()
+			self.index = PickIndex(positions, self.pickRadii())
+		return self.index
+
+	def pick(self, point):
+		index = self.pickIndex().nearest(point.x(), point.y())
+		if index is None:
+			return None
+		return self.graph.vertices[index]
+
+	def hover(self, point):
+		# returns whether the hovered vertex changed
+		hovered = self.pickIndex().nearest(point.x(), point.y())
+		if hovered == self.hovered:
+			return False
+		self.hovered = hovered
+		return True
+
+	def select(self, rect, extend=False):
+		selection = self.pickIndex().inRect(rect.left(), rect.top(), rect.right(), rect.bottom())
+		if extend:
+			selection = numpy.union1d(self.selection, selection)
+		self.selection = selection
+
+	def clearMarks(self):
+		self.hovered = None
+		self.selection = numpy.zeros(0, dtype=numpy.int64)
+
+	def hasMarks(self):
+		return self.hovered is not None or len(self.selection) > 0
+
+	def paintOverlay(self, painter):
+		# selection and hover marks at the positions the index was built from, over either renderer
+		if not self.hasMarks():
+			return
+		index = self.pickIndex()
+		if len(self.selection):
+			self.paintDots(painter, index.points[self.selection], index.radii[self.selection].max() * 2 + 6, self.SELECTION_COLOR)
+		if self.hovered is not None:
+			painter.setPen(QPen(self.HOVER_COLOR, 2))
+			painter.setBrush(Qt.NoBrush)
+			radius = index.radii[self.hovered] + 3
+			(x, y) = index.points[self.hovered].tolist()
+			painter.drawEllipse(QPointF(x, y), radius, radius)
+
+	def syncGrabbed(self):
+		self.graph.layout.positions[self.grabbed.index] = (self.grabbed.x(), self.grabbed.y())
+		self.refresh()
+
+	def mousePressEvent(self, event):
+		self.grabbed = self.pick(event.scenePos())
+		if self.grabbed is None:
+			event.ignore()
+			return
+		self.grabbed.circle.move()
+		self.grabbed.circle.mousePressEvent(event)
+
+	def mouseMoveEvent(self, event):
+		if self.grabbed is not None:
+			self.grabbed.circle.mouseMoveEvent(event)
+			self.syncGrabbed()
+
+	def mouseReleaseEvent(self, event):
+		if self.grabbed is not None:
+			self.grabbed.circle.mouseReleaseEvent(event)
+			self.syncGrabbed()
+			self.grabbed = None
+
+	def mouseDoubleClickEvent(self, event):
+		self.grabbed = self.pick(event.scenePos())
+		if self.grabbed is None:
+			event.ignore()
+			return
+		self.grabbed.circle.mouseDoubleClickEvent(event)
+		self.refresh()
+
+class GraphItem3D(GraphItem):
+	# perspective renderer: every frame is projected in one pass, sorted once far to near
+	# and drawn in DEPTH_LAYERS bulk calls whose width and alpha fall off with depth
+	DEPTH_LAYERS = 16
+	MIN_ALPHA = 48
+
+	def __init__(self, graph, camera):
+		super().__init__(graph)
+		self.camera = camera
+		self.scales = numpy.zeros(0)
+		self.setAcceptedMouseButtons(Qt.NoButton)
+
+	def positions(self):
+		(positions, self.scales) = self.camera.perspective(self.graph.layout.positions)
+		return positions
+
+	def pickRadii(self):
+		return self.RADIUS * self.scales
+
+	def margin(self):
+		if len(self.scales) == 0:
+			return self.RADIUS + 1
+		return self.RADIUS * self.scales.max() + 1
+
+	def paint(self, painter, option, widget):
+		positions = self.positions()
+		if len(positions) == 0:
+			return
+		rect = option.exposedRect
+		scale = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+		(low, high) = (self.scales.min(), self.scales.max())
+		layerCount = self.DEPTH_LAYERS if high > low else 1
+
+		def layerOf(scales):
+			return numpy.minimum(((scales - low) / max(high - low, 1e-12) * layerCount).astype(numpy.int64), layerCount - 1)
+
+		vertices = numpy.nonzero(visibleMask(positions, rect, self.margin()))[0]
+		edges = numpy.zeros(0, dtype=numpy.int64)
+		if self.edgesVisible:
+			adjacency = self.graph.layout.currentAdjacency()
+			edges = numpy.nonzero(self.edgeMask(positions[adjacency.sources], positions[adjacency.targets], rect, scale))[0]
+			(sources, targets) = (adjacency.sources[edges], adjacency.targets[edges])
+		# edges and vertices share one sort key, within a layer the edges go first so the vertices cover their ends
+		keys = layerOf(self.scales[vertices]) * 2 + 1
+		if len(edges):
+			keys = numpy.concatenate((layerOf((self.scales[sources] + self.scales[targets]) / 2) * 2, keys))
+		order = numpy.argsort(keys, kind="stable")
+		bounds = numpy.searchsorted(keys[order], numpy.arange(layerCount * 2 + 1))
+		for key in range(layerCount * 2):
+			members = order[bounds[key]:bounds[key + 1]]
+			if len(members) == 0:
+				continue
+			layer = key // 2
+			color = QColor(0, 0, 0, int(self.MIN_ALPHA + (255 - self.MIN_ALPHA) * (layer + 1) / layerCount))
+			if key % 2 == 0:
+				ends = numpy.stack((positions[sources[members]], positions[targets[members]]), axis=1).reshape(-1, 2)
+				painter.setPen(QPen(color))
+				painter.drawLines(pointPolygon(ends))
+			else:
+				members = vertices[members - len(edges)]
+				radius = self.RADIUS * self.scales[members].mean()
+				self.paintDots(painter, positions[members], radius * 2 + 1, color)
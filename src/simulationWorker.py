@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+from PyQt5.QtCore import QThread
+import copy, queue, threading, numpy
+from src.layout import AdaptiveCooling
+from src.profiler import PROFILER
+
+class SimulationWorker(QThread):
+	# iterates a private copy of the layout and publishes positions into a double buffer
+	def __init__(self, layout, size, area, bounds, stability=1, convergedStep=0.1, stillTicks=20):
+		super().__init__()
+		self.layout = copy.copy(layout)
+		self.layout.positions = layout.positions.copy()
+		self.layout.movable = layout.movable.copy()
+		self.size = size
+		self.area = area
+		self.bounds = bounds
+		self.stability = stability
+		self.convergedStep = convergedStep
+		self.stillTicksLimit = stillTicks
+		self.stillTicks = 0
+		self.cooling = AdaptiveCooling()
+		self.converged = True
+		self.commands = queue.Queue()
+		self.lock = threading.Lock()
+		self.front = self.layout.positions.copy()
+		self.back = self.layout.positions.copy()
+		self.frame = 0
+		self.applied = 0
+
+	def send(self, *command):
+		self.commands.put(command)
+
+	def stop(self):
+		self.send("stop")
+		self.wait()
+
+	def latest(self, out):
+		with self.lock:
+			numpy.copyto(out, self.front)
+			return (self.frame, self.applied, self.stability)
+
+	def publish(self):
+		numpy.copyto(self.back, self.layout.positions)
+		with self.lock:
+			(self.front, self.back) = (self.back, self.front)
+			self.frame += 1
+
+	def execute(self, command):
+		name = command[0]
+		if name == "vertex":
+			(index, position, movable) = command[1:]
+			self.layout.positions[index] = position
+			self.layout.movable[index] = movable
+		elif name == "movable":
+			self.layout.movable = command[1].copy()
+		elif name == "configure":
+			for (key, value) in command[1].items():
+				setattr(self.layout, key, value)
+		elif name == "reheat":
+			self.stability = min(command[1], self.stability)
+			self.cooling.reset()
+			self.stillTicks = 0
+			self.converged = False
+		elif name == "stop":
+			return False
+		self.applied += 1
+		return True
+
+	def run(self):
+		while True:
+			try:
+				command = self.commands.get(block=self.converged)
+				while True:
+					if not self.execute(command):
+						return
+					command = self.commands.get_nowait()
+			except queue.Empty:
+				pass
+			if self.converged:
+				self.publish()
+				continue
+			PROFILER.tick()
+			temperature = self.size / self.stability * self.cooling.scale
+			step = self.layout.move(temperature, self.area, None, self.bounds)
+			self.cooling.update(self.layout.energy)
+			PROFILER.counter("temperature", temperature)
+			PROFILER.counter("energy", self.layout.energy)
+			self.stability += 1
+			if step < self.convergedStep:
+				self.stillTicks += 1
+			else:
+				self.stillTicks = 0
+			self.converged = self.stillTicks >= self.stillTicksLimit
+			if self.converged:
+				self.layout.repackComponents(self.size)
+			with PROFILER.phase("publish"):
+				self.publish()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import numpy
+from src.forceKernel import jitter
+
+MAX_DEPTH = 24
+
+class SpaceTree(object):
+	# quadtree for 2D positions, octree for 3D positions
+	def __init__(self, positions, maxDepth=MAX_DEPTH):
+		self.positions = positions
+		count, self.dimension = positions.shape
+		self.branch = pow(2, self.dimension)
+		lower = positions.min(axis=0)
+		upper = positions.max(axis=0)
+		centers = [((lower + upper) / 2)[None, :]]
+		halves = [numpy.array([max((upper - lower).max() / 2, 1e-6) * (1 + 1e-9)])]
+		parents = [numpy.array([-1])]
+		nodeCount = 1
+		levelStart = 0
+		self.leafOf = numpy.zeros(count, dtype=numpy.intp)
+		points = numpy.arange(count)
+		childLinks = []
+		for depth in range(maxDepth):
+			levelSize = len(halves[-1])
+			nodes = self.leafOf[points] - levelStart
+			counts = numpy.bincount(nodes, minlength=levelSize)
+			points = points[counts[nodes] > 1]
+			if len(points) == 0:
+				break
+			parent = self.leafOf[points]
+			local = parent - levelStart
+			levelCenters = centers[-1]
+			octant = numpy.zeros(len(points), dtype=numpy.intp)
+			for axis in range(self.dimension):
+				octant |= (positions[points, axis] >= levelCenters[local, axis]).astype(numpy.intp) << axis
+			keys, inverse = numpy.unique(parent * self.branch + octant, return_inverse=True)
+			childParent = keys // self.branch
+			childOctant = keys % self.branch
+			childLocal = childParent - levelStart
+			childHalf = halves[-1][childLocal] / 2
+			signs = numpy.stack([((childOctant >> axis) & 1) * 2 - 1 for axis in range(self.dimension)], axis=1)
+			centers.append(levelCenters[childLocal] + signs * childHalf[:, None])
+			halves.append(childHalf)
+			parents.append(childParent)
+			linkParents, firstChild, childCounts = numpy.unique(childParent, return_index=True, return_counts=True)
+			childLinks.append((linkParents, firstChild + nodeCount, childCounts))
+			self.leafOf[points] = nodeCount + inverse.reshape(-1)
+			levelStart = nodeCount
+			nodeCount += len(keys)
+		self.centers = numpy.concatenate(centers)
+		self.halves = numpy.concatenate(halves)
+		self.parents = numpy.concatenate(parents)
+		self.levels = numpy.cumsum([0] + [len(level) for level in halves])
+		self.childStart = numpy.zeros(nodeCount, dtype=numpy.intp)
+		self.childCount = numpy.zeros(nodeCount, dtype=numpy.intp)
+		for (linkParents, firstChild, childCounts) in childLinks:
+			self.childStart[linkParents] = firstChild
+			self.childCount[linkParents] = childCounts
+		self.masses = self.accumulate(numpy.ones((count, 1)))[:, 0]
+		self.massCenters = self.accumulate(positions) / numpy.maximum(self.masses, 1)[:, None]
+
+	def numOfNodes(self):
+		return len(self.halves)
+
+	def accumulate(self, values):
+		nodeCount = self.numOfNodes()
+		sums = numpy.zeros((nodeCount, values.shape[1]))
+		for column in range(values.shape[1]):
+			sums[:, column] = numpy.bincount(self.leafOf, values[:, column], nodeCount)
+		for level in range(len(self.levels) - 2, 0, -1):
+			(start, stop) = (self.levels[level], self.levels[level + 1])
+			(parentStart, parentStop) = (self.levels[level - 1], self.levels[level])
+			local = self.parents[start:stop] - parentStart
+			for column in range(values.shape[1]):
+				sums[parentStart:parentStop, column] += numpy.bincount(local, sums[start:stop, column], parentStop - parentStart)
+		return sums
+
+	def interactions(self, theta, points=None):
+		# yields (points, nodes, masses, massCenters) of every accepted point-node pair
+		if points is None:
+			points = numpy.arange(len(self.positions))
+		nodes = numpy.zeros(len(points), dtype=numpy.intp)
+		while len(points):
+			leaf = self.childCount[nodes] == 0
+			inside = numpy.all(numpy.abs(self.positions[points] - self.centers[nodes]) <= self.halves[nodes][:, None], axis=1)
+			diff = self.positions[points] - self.massCenters[nodes]
+			distanceSquare = numpy.einsum("ij,ij->i", diff, diff)
+			far = pow(2 * self.halves[nodes], 2) < pow(theta, 2) * distanceSquare
+			accept = leaf | (far & ~inside)
+			acceptPoints = points[accept]
+			acceptNodes = nodes[accept]
+			masses = self.masses[acceptNodes].copy()
+			massCenters = self.massCenters[acceptNodes].copy()
+			own = self.leafOf[acceptPoints] == acceptNodes
+			if numpy.any(own):
+				masses[own] -= 1
+				rest = numpy.maximum(masses[own], 1)[:, None]
+				massCenters[own] = (massCenters[own] * (masses[own] + 1)[:, None] - self.positions[acceptPoints[own]]) / rest
+			keep = masses > 0
+			yield (acceptPoints[keep], acceptNodes[keep], masses[keep], massCenters[keep])
+			openPoints = points[~accept]
+			openNodes = nodes[~accept]
+			counts = self.childCount[openNodes]
+			points = numpy.repeat(openPoints, counts)
+			offsets = numpy.arange(len(points)) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+			nodes = numpy.repeat(self.childStart[openNodes], counts) + offsets
+
+def barnesHutDisplacement(positions, kValue, theta, rng=None, colors=None, rows=None):
+	if rng is None:
+		rng = numpy.random
+	disp = numpy.zeros_like(positions)
+	if len(positions) < 2:
+		return disp if rows is None else disp[rows]
+	tree = SpaceTree(positions)
+	kSquare = pow(kValue, 2)
+	if colors is not None:
+		# sum of |ci - cj|^2 over a node is m|ci|^2 - 2 ci.S + Q with S, Q the node's color and squared norm sums
+		colorNorms = numpy.einsum("ij,ij->i", colors, colors)
+		colorSums = tree.accumulate(colors)
+		normSums = tree.accumulate(colorNorms[:, None])[:, 0]
+	for (points, nodes, masses, massCenters) in tree.interactions(theta, rows):
+		diff = positions[points] - massCenters
+		jitter(diff, rng)
+		if colors is not None:
+			# the point's own term in its leaf is zero, so the full node sums can be used
+			masses = (tree.masses[nodes] * colorNorms[points] - 2 * numpy.einsum("ij,ij->i", colors[points], colorSums[nodes])
+				+ normSums[nodes]).clip(min=0) / pow(256, 2)
+		weight = kSquare * masses / numpy.einsum("ij,ij->i", diff, diff)
+		for axis in range(positions.shape[1]):
+			disp[:, axis] += numpy.bincount(points, diff[:, axis] * weight, len(positions))
+	return disp if rows is None else disp[rows]
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# layout benchmark: python -m tests.benchmark [-o report.json] [--compare baseline.json]
+import argparse, json, os, platform, random, sys, time, tracemalloc, numpy
+from src.layout import Layout, anneal, sceneBounds
+from src.placement import PLACEMENTS, PLACED_STABILITY, initialPositions
+from src.graphFile import catalog, catalogName, loadGraph
+from src.parallelRepulsion import RepulsionPool
+
+SIZE = 640
+SYNTHETIC_SIZES = (100, 300, 1000)
+SYNTHETIC_DEGREE = 4
+ITERATIONS = 50
+MEMORY_ITERATIONS = 5
+# steps oscillate at the temperature size / stability, so this budget reaches steps of 0.5 even without early convergence
+CONVERGENCE_BUDGET = SIZE * 4
+TOLERANCE = 0.5
+REGRESSION = 1.25
+ENGINES = ("layout", "barnesHut", "parallel", "graph")
+
+def syntheticGraph(vertexCount, degree, rng):
+	# a ring keeps the graph connected, random chords bring the mean degree up
+	ring = numpy.stack((numpy.arange(vertexCount), (numpy.arange(vertexCount) + 1) % vertexCount), axis=1)
+	chords = rng.randint(0, vertexCount, (vertexCount * (degree - 2) // 2, 2))
+	return numpy.concatenate((ring, chords[chords[:, 0] != chords[:, 1]]))
+
+def fixtures(sizes, seed):
+	for path in catalog():
+		(vertexCount, edges, labels) = loadGraph(path)
+		yield (catalogName(path), vertexCount, numpy.asarray(edges).reshape(-1, 2))
+	rng = numpy.random.RandomState(seed)
+	for size in sizes:
+		yield ("synthetic" + str(size), size, syntheticGraph(size, SYNTHETIC_DEGREE, rng))
+
+class LayoutEngine(object):
+	# the headless engine batchLayout uses
+	def __init__(self, vertexCount, edges, dimension, seed, placement, barnesHut=False, pool=None):
+		self.layout = Layout(vertexCount, edges, dimension)
+		self.layout.rng = numpy.random.RandomState(seed)
+		self.layout.barnesHut = barnesHut
+		self.layout.pool = pool
+		self.layout.positions = startPositions(placement, self.layout.currentAdjacency(), dimension, seed)
+		self.stability = firstStability(placement)
+
+	def anneal(self, iterations, tolerance=None):
+		count = anneal(self.layout, SIZE, iterations, tolerance, self.stability)
+		self.stability += count
+		return count
+
+class GraphEngine(object):
+	# Graph / Graph3D as the windows drive them, including the QVector <-> numpy round trip of every tick
+	def __init__(self, vertexCount, edges, dimension, seed, placement):
+		random.seed(seed)
+		positions = startPositions(placement, Layout(vertexCount, edges).currentAdjacency(), dimension, seed)
+		if dimension == 2:
+			from src.main import Vertex, Graph
+			self.graph = Graph(*[Vertex(x, y) for (x, y) in positions.tolist()])
+		else:
+			from src.main3D import Vertex3D, Graph3D
+			from PyQt5.QtGui import QVector3D
+			self.graph = Graph3D(*[Vertex3D(x, y, z) for (x, y, z) in positions.tolist()])
+			self.viewCenter = QVector3D(SIZE * 5 / 8, SIZE * 5 / 8, SIZE * 5 / 8)
+		self.graph.layout.rng = numpy.random.RandomState(seed)
+		self.graph.addEdges(edges)
+		self.dimension = dimension
+		self.area = SIZE * SIZE
+		self.bounds = sceneBounds(SIZE, dimension)
+		self.center = numpy.full(3, SIZE * 5 / 8)
+		self.stability = firstStability(placement)
+
+	def anneal(self, iterations, tolerance=None):
+		for count in range(1, iterations + 1):
+			if self.dimension == 2:
+				step = self.graph.move(SIZE / self.stability, self.area, self.bounds)
+			else:
+				step = self.graph.move(SIZE / self.stability, self.area, self.viewCenter, self.bounds)
+				self.area = self.graph.layout.autosize(self.area, self.center, SIZE, SIZE / (self.stability + 1))
+			self.stability += 1
+			if tolerance is not None and step < tolerance:
+				break
+		return count
+
+def startPositions(placement, adjacency, dimension, seed):
+	return initialPositions(placement, adjacency, SIZE * 5 / 8, SIZE / 4, dimension, numpy.random.RandomState(seed))
+
+def firstStability(placement):
+	return 1 if placement == "circle" else PLACED_STABILITY
+
+def makeEngine(engine, vertexCount, edges, dimension, arguments, pool):
+	if engine == "graph":
+		return GraphEngine(vertexCount, edges, dimension, arguments.seed, arguments.placement)
+	if engine == "parallel":
+		return LayoutEngine(vertexCount, edges, dimension, arguments.seed, arguments.placement, pool=pool)
+	return LayoutEngine(vertexCount, edges, dimension, arguments.seed, arguments.placement, engine == "barnesHut")
+
+def measure(engine, name, vertexCount, edges, dimension, arguments, pool=None):
+	result = {"fixture": name, "engine": engine, "dimension": dimension, "vertices": vertexCount, "edges": len(edges)}
+	subject = makeEngine(engine, vertexCount, edges, dimension, arguments, pool)
+	startTime = time.perf_counter()
+	iterations = subject.anneal(arguments.iterations)
+	result["iterationsPerSecond"] = iterations / (time.perf_counter() - startTime)
+	subject = makeEngine(engine, vertexCount, edges, dimension, arguments, pool)
+	startTime = time.perf_counter()
+	iterations = subject.anneal(arguments.budget, arguments.tolerance)
+	result["convergenceSeconds"] = time.perf_counter() - startTime
+	result["convergenceIterations"] = iterations
+	result["converged"] = iterations < arguments.budget
+	# tracemalloc slows python down, so memory is measured in a separate short run
+	tracemalloc.start()
+	subject = makeEngine(engine, vertexCount, edges, dimension, arguments, pool)
+	subject.anneal(MEMORY_ITERATIONS)
+	result["peakBytes"] = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	return result
+
+def environment(arguments):
+	return {"seed": arguments.seed, "placement": arguments.placement, "processes": arguments.processes, "iterations": arguments.iterations, "tolerance": arguments.tolerance, "budget": arguments.budget,
+		"python": platform.python_version(), "numpy": numpy.__version__, "machine": platform.machine(),
+		"processor": platform.processor(), "system": platform.platform(), "cpus": os.cpu_count()}
+
+def resultKey(result):
+	return (result["fixture"], result["engine"], result["dimension"])
+
+def compare(results, baselinePath, threshold):
+	# a result regresses when it is slower or bigger than the baseline by more than the threshold ratio
+	with open(baselinePath, encoding="utf-8") as file:
+		baseline = {resultKey(result): result for result in json.load(file)["results"]}
+	regressions = []
+	for result in results:
+		previous = baseline.get(resultKey(result))
+		if previous is None:
+			continue
+		ratios = {"iterationsPerSecond": previous["iterationsPerSecond"] / result["iterationsPerSecond"],
+			"convergenceSeconds": result["convergenceSeconds"] / max(previous["convergenceSeconds"], 1e-9),
+			"peakBytes": result["peakBytes"] / max(previous["peakBytes"], 1)}
+		for (metric, ratio) in ratios.items():
+			if ratio > threshold:
+				regressions.append((resultKey(result), metric, ratio))
+	for (key, metric, ratio) in regressions:
+		print("regression: " + " ".join(str(part) for part in key) + " " + metric + " x" + format(ratio, ".2f"))
+	return regressions
+
+def parseArguments(argv):
+	parser = argparse.ArgumentParser(description="measure iteration speed, time to convergence and peak memory of the layout engines")
+	parser.add_argument("-o", "--output", default="benchmark.json", help="machine-readable report")
+	parser.add_argument("-e", "--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+	parser.add_argument("-d", "--dimensions", nargs="+", type=int, choices=(2, 3), default=[2, 3])
+	parser.add_argument("-s", "--sizes", nargs="*", type=int, default=list(SYNTHETIC_SIZES), help="synthetic graph sizes")
+	parser.add_argument("-f", "--fixtures", nargs="*", default=None, help="only these fixture names")
+	parser.add_argument("-n", "--iterations", type=int, default=ITERATIONS, help="iterations timed for the speed figure")
+	parser.add_argument("-t", "--tolerance", type=float, default=TOLERANCE, help="step length counted as converged")
+	parser.add_argument("-b", "--budget", type=int, default=CONVERGENCE_BUDGET, help="iteration limit of the convergence run")
+	parser.add_argument("-p", "--placement", choices=PLACEMENTS, default="circle", help="initial placement before annealing")
+	parser.add_argument("-j", "--processes", type=int, default=None, help="worker processes of the parallel engine (default: cpu count)")
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--compare", default=None, help="baseline report to check for regressions")
+	parser.add_argument("--threshold", type=float, default=REGRESSION, help="slowdown ratio counted as a regression")
+	return parser.parse_args(argv)
+
+def main(argv):
+	arguments = parseArguments(argv)
+	if "graph" in arguments.engines:
+		os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+		from PyQt5.QtWidgets import QApplication
+		application = QApplication.instance() or QApplication(["benchmark"])
+	pool = None
+	if "parallel" in arguments.engines:
+		pool = RepulsionPool(arguments.processes)
+	results = []
+	for (name, vertexCount, edges) in fixtures(arguments.sizes, arguments.seed):
+		if arguments.fixtures is not None and name not in arguments.fixtures:
+			continue
+		for dimension in arguments.dimensions:
+			for engine in arguments.engines:
+				result = measure(engine, name, vertexCount, edges, dimension, arguments, pool)
+				results.append(result)
+				print("{fixture:>14} {engine:>9} {dimension}D {vertices:>6}v {edges:>7}e {iterationsPerSecond:9.1f} it/s"
+					" {convergenceIterations:>4} it {convergenceSeconds:8.3f} s {peakBytes:>11} B".format(**result))
+	if pool is not None:
+		pool.close()
+	with open(arguments.output, "w", encoding="utf-8") as file:
+		json.dump({"environment": environment(arguments), "results": results}, file, indent=1)
+	if arguments.compare is not None and compare(results, arguments.compare, arguments.threshold):
+		return 1
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv[1:]))
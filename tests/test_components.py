@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import numpy, pytest
+from src.layout import Layout, SMALL_COMPONENT, anneal, sceneBounds
+from src.forceKernel import repulsiveDisplacement, pairRepulsion
+from src.adjacency import connectedComponents
+
+SIZE = 600
+K_VALUE = 12.0
+
+def pathEdges(vertices):
+	return list(zip(vertices[:-1], vertices[1:]))
+
+def disconnectedLayout(dimension=2, colored=False):
+	# one component above SMALL_COMPONENT, two small paths and an isolated vertex, interleaved
+	rng = numpy.random.RandomState(1)
+	vertexCount = SMALL_COMPONENT + 20
+	order = rng.permutation(vertexCount)
+	groups = [order[0:SMALL_COMPONENT], order[SMALL_COMPONENT:SMALL_COMPONENT + 7], order[SMALL_COMPONENT + 7:vertexCount - 1], order[vertexCount - 1:]]
+	edges = [edge for group in groups for edge in pathEdges(group.tolist())]
+	layout = Layout(vertexCount, edges, dimension)
+	layout.positions = rng.random_sample((vertexCount, dimension)) * SIZE
+	if colored:
+		layout.colors = rng.random_sample((vertexCount, 3)) * 256
+	return (layout, groups)
+
+def boxes(layout, skipped):
+	# the bounding boxes of the components without the skipped vertex
+	(count, labels) = connectedComponents(layout.currentAdjacency())
+	return [(layout.positions[labels == label].min(axis=0), layout.positions[labels == label].max(axis=0)) for label in range(count) if label != labels[skipped]]
+
+def testPairRepulsionMatchesKernel():
+	rng = numpy.random.RandomState(1)
+	positions = rng.random_sample((30, 2)) * SIZE
+	colors = rng.random_sample((30, 3)) * 256
+	pairs = numpy.stack(numpy.triu_indices(30, 1), axis=1)
+	numpy.testing.assert_allclose(pairRepulsion(positions, K_VALUE, pairs, colors), repulsiveDisplacement(positions, K_VALUE, colors))
+
+@pytest.mark.parametrize("dimension,colored", ((2, False), (2, True), (3, False)))
+def testNoRepulsionBetweenComponents(dimension, colored):
+	(layout, groups) = disconnectedLayout(dimension, colored)
+	layout.disp = numpy.zeros_like(layout.positions)
+	layout.repulsiveForces(K_VALUE)
+	for group in groups:
+		colors = None if layout.colors is None else layout.colors[group]
+		numpy.testing.assert_allclose(layout.disp[group], repulsiveDisplacement(layout.positions[group], K_VALUE, colors), atol=1e-9)
+	rows = numpy.array([groups[0][3], groups[1][0], groups[3][0], groups[2][2]])
+	expected = numpy.concatenate([layout.disp[rows[0:2]], numpy.zeros((1, dimension)), layout.disp[rows[3:4]]])
+	numpy.testing.assert_allclose(layout.repulsiveRows(K_VALUE, rows), expected, atol=1e-9)
+
+def testMoveKeepsFreeComponentsInPlace():
+	(layout, groups) = disconnectedLayout()
+	layout.movable[groups[1][0]] = False
+	before = [layout.positions[group].mean(axis=0) for group in groups]
+	layout.move(SIZE / 4, SIZE * SIZE)
+	for index in (0, 2, 3):
+		numpy.testing.assert_allclose(layout.positions[groups[index]].mean(axis=0), before[index])
+	# a component holding a vertex that may not move is left to its forces
+	assert not numpy.allclose(layout.positions[groups[1]].mean(axis=0), before[1])
+
+def testAnnealPacksComponentsApart():
+	(layout, groups) = disconnectedLayout()
+	fixedVertex = groups[2][0]
+	layout.movable[fixedVertex] = False
+	pinned = layout.positions[fixedVertex].copy()
+	anneal(layout, SIZE, 200)
+	(lower, upper) = sceneBounds(SIZE)
+	assert numpy.all(layout.positions >= lower - 1e-9) and numpy.all(layout.positions <= upper + 1e-9)
+	assert numpy.array_equal(layout.positions[fixedVertex], pinned)
+	free = boxes(layout, fixedVertex)
+	for (index, (lower1, upper1)) in enumerate(free):
+		for (lower2, upper2) in free[index + 1:]:
+			assert not (numpy.all(lower1 < upper2) and numpy.all(lower2 < upper1))
+
+def testConnectedGraphIsNotRepacked():
+	layout = Layout(5, pathEdges(list(range(5))))
+	layout.positions = numpy.arange(10, dtype=float).reshape(5, 2)
+	assert layout.componentGroups() is None
+	assert layout.repackComponents(SIZE) == 1
+	assert numpy.array_equal(layout.positions, numpy.arange(10, dtype=float).reshape(5, 2))
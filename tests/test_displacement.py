@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# the vectorized displacement against the per-vertex reference loops of the GUI graphs: python -m pytest tests
+import os, random, numpy, pytest
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QVector3D
+from src.main import Vertex, Graph
+from src.main3D import Vertex3D, Graph3D
+
+VERTEX_COUNT = 40
+EDGE_COUNT = 80
+SIZE = 500
+SEED = 1
+# the reference loops add up in the single precision of QVector2D / QVector3D
+TOLERANCE = 1e-4
+
+@pytest.fixture(scope="module", autouse=True)
+def application():
+	return QApplication.instance() or QApplication([])
+
+def randomEdges(rng):
+	# a path through every vertex keeps the graph connected, as the reference loops repel across components
+	edges = rng.randint(0, VERTEX_COUNT, (EDGE_COUNT, 2))
+	path = numpy.stack((numpy.arange(VERTEX_COUNT - 1), numpy.arange(1, VERTEX_COUNT)), axis=1)
+	return numpy.concatenate((path, edges[edges[:, 0] != edges[:, 1]]))
+
+def graph2D(colored):
+	# random.seed fixes the vertex colors, spread positions keep the jitter out of both paths
+	random.seed(SEED)
+	rng = numpy.random.RandomState(SEED)
+	positions = rng.random_sample((VERTEX_COUNT, 2)) * SIZE
+	graph = Graph(*[Vertex(x, y) for (x, y) in positions.tolist()])
+	graph.addEdges(randomEdges(rng))
+	graph.colored = colored
+	graph.layout.rng = rng
+	return graph
+
+def graph3D():
+	random.seed(SEED)
+	rng = numpy.random.RandomState(SEED)
+	positions = rng.random_sample((VERTEX_COUNT, 3)) * SIZE
+	# depths at least 0.1 apart, so no z jitter either
+	positions[:, 2] = rng.permutation(VERTEX_COUNT) * SIZE / VERTEX_COUNT
+	graph = Graph3D(*[Vertex3D(x, y, z) for (x, y, z) in positions.tolist()])
+	graph.addEdges(randomEdges(rng))
+	graph.layout.rng = rng
+	return graph
+
+def assertClose(disp, reference):
+	numpy.testing.assert_allclose(disp, reference, rtol=TOLERANCE, atol=TOLERANCE * numpy.abs(reference).max())
+
+@pytest.mark.parametrize("colored", (False, True))
+def testDisplacement2D(colored):
+	graph = graph2D(colored)
+	kValue = graph.kValue(SIZE * SIZE)
+	graph.displacement(kValue)
+	graph.displacementReference(kValue)
+	reference = numpy.array([(vertex.disp.x(), vertex.disp.y()) for vertex in graph.vertices])
+	assertClose(graph.layout.disp, reference)
+
+def testDisplacement3D():
+	graph = graph3D()
+	kValue = graph.kValue(SIZE * SIZE)
+	center = QVector3D(SIZE / 2, SIZE / 2, SIZE / 2)
+	graph.displacement(kValue, center)
+	graph.displacementReference(kValue, center)
+	reference = numpy.array([(vertex.disp.x(), vertex.disp.y(), vertex.disp.z()) for vertex in graph.vertices])
+	assertClose(graph.layout.disp, reference)
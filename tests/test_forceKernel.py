@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import tracemalloc, numpy
+from src import forceKernel
+from src.forceKernel import BLOCK_SIZE, blockSize, repulsiveDisplacement
+
+def testBlockSizeKeepsToElementBudget():
+	assert blockSize(1000, 2) == BLOCK_SIZE
+	for (columnCount, dimension) in ((100000, 3), (100000, 2), (10 ** 7, 3)):
+		size = blockSize(columnCount, dimension)
+		assert size >= 1
+		assert size == 1 or size * columnCount * 3 <= forceKernel.BLOCK_ELEMENTS
+
+def testSmallBlocksBoundMemoryAndKeepTheResult(monkeypatch):
+	rng = numpy.random.RandomState(1)
+	positions = rng.random_sample((3000, 3)) * 500
+	# depths at least 0.1 apart, so no pair is jittered
+	positions[:, 2] = rng.permutation(3000) / 6
+	colors = rng.random_sample((3000, 3)) * 256
+	expected = repulsiveDisplacement(positions, 12.0, colors, numpy.random.RandomState(1))
+	monkeypatch.setattr(forceKernel, "BLOCK_ELEMENTS", pow(2, 16))
+	tracemalloc.start()
+	disp = repulsiveDisplacement(positions, 12.0, colors, numpy.random.RandomState(1))
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	# a 256 row block would take 3000 * 256 * 3 * 8 bytes = 18 MB per temporary
+	assert peak < pow(2, 16) * 8 * 8
+	# only the summation order differs
+	numpy.testing.assert_allclose(disp, expected, rtol=1e-9, atol=1e-9 * numpy.abs(expected).max())
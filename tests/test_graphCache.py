@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import os, numpy, pytest
+from src import graphCache
+from src.graphCache import GraphCache, contentHash
+
+def writeModule(directory, name, vertexCount):
+	# a ring, so every graph has different content
+	path = str(directory / (name + ".py"))
+	edges = [(index, (index + 1) % vertexCount) for index in range(vertexCount)]
+	with open(path, "w", encoding="utf-8") as file:
+		file.write("vertexCount = " + str(vertexCount) + "\nedges = " + repr(edges) + "\nlabels = None\n")
+	return path
+
+@pytest.fixture
+def cache(tmp_path):
+	directory = tmp_path / "cache"
+	directory.mkdir()
+	return GraphCache(str(directory))
+
+def testMissThenHit(tmp_path, cache, monkeypatch):
+	path = writeModule(tmp_path, "ring", 6)
+	first = cache.open(path, 2)
+	assert first.key == contentHash(path)
+	assert os.path.isdir(cache.entry(first.key))
+	# a hit never parses the graph file again
+	monkeypatch.setattr(graphCache, "openGraph", lambda path: pytest.fail("cache miss on " + path))
+	second = cache.open(path, 2)
+	assert second.vertexCount == 6
+	assert numpy.array_equal(second.edges, first.adjacency.edgeList())
+	assert numpy.array_equal(second.adjacency.neighbors, first.adjacency.neighbors)
+	assert numpy.array_equal(second.adjacency.offsets, first.adjacency.offsets)
+
+def testChangedContentMisses(tmp_path, cache):
+	path = writeModule(tmp_path, "ring", 6)
+	first = cache.open(path, 2)
+	writeModule(tmp_path, "ring", 7)
+	second = cache.open(path, 2)
+	assert second.key != first.key
+	assert second.vertexCount == 7
+
+def testLayoutIsKeptPerDimension(tmp_path, cache):
+	path = writeModule(tmp_path, "ring", 6)
+	graphData = cache.open(path, 2)
+	assert graphData.positions is None
+	positions = numpy.arange(12, dtype=float).reshape(6, 2)
+	fixed = numpy.array([True, False, False, False, False, True])
+	cache.storeLayout(graphData.key, positions, fixed)
+	graphData = cache.open(path, 2)
+	assert numpy.array_equal(graphData.positions, positions)
+	assert numpy.array_equal(graphData.fixed, fixed)
+	assert cache.open(path, 3).positions is None
+
+def testEvictsLeastRecentlyUsed(tmp_path, cache):
+	paths = [writeModule(tmp_path, "ring" + str(index), 20 + index) for index in range(3)]
+	keys = [cache.open(path, 2).key for path in paths]
+	entrySize = max(graphCache.directorySize(cache.entry(key)) for key in keys)
+	# ring0 was used last, ring1 least recently
+	for (key, mtime) in zip(keys, (300, 100, 200)):
+		os.utime(cache.entry(key), (mtime, mtime))
+	cache.maxBytes = entrySize * 3
+	newest = cache.open(writeModule(tmp_path, "ring3", 23), 2).key
+	remaining = set(os.listdir(cache.directory))
+	assert remaining == {keys[0], keys[2], newest}
+
+def testNewEntryIsKeptEvenWhenTooLarge(tmp_path, cache):
+	cache.maxBytes = 1
+	key = cache.open(writeModule(tmp_path, "ring", 6), 2).key
+	assert os.listdir(cache.directory) == [key]
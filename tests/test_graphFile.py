@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import os, numpy, pytest
+from src.graphFile import HEADER, writeBinaryGraph, readBinaryGraph, openGraph, convert
+
+EDGES = numpy.array([(0, 1), (1, 2), (2, 0), (2, 3)])
+LABELS = ["a", "b", "Gavroche", "é"]
+
+def testBinaryRoundTrip(tmp_path):
+	path = str(tmp_path / "graph.vgb")
+	positions = numpy.arange(8, dtype=float).reshape(4, 2) / 3
+	writeBinaryGraph(path, 4, EDGES, LABELS, positions)
+	graph = readBinaryGraph(path)
+	assert graph.vertexCount == 4
+	assert numpy.array_equal(graph.edges, EDGES)
+	assert graph.labels == LABELS
+	assert numpy.array_equal(graph.positions, positions)
+	# the arrays are views of the mapped file, not copies
+	assert not graph.edges.flags.owndata
+
+def testOptionalSections(tmp_path):
+	path = str(tmp_path / "bare.vgb")
+	writeBinaryGraph(path, 5, EDGES)
+	graph = readBinaryGraph(path)
+	assert (graph.vertexCount, graph.labels, graph.positions) == (5, None, None)
+	assert numpy.array_equal(graph.edges, EDGES)
+
+def testConvertMatchesModule(tmp_path):
+	modulePath = str(tmp_path / "small.py")
+	with open(modulePath, "w", encoding="utf-8") as file:
+		file.write("vertexCount = 4\nedges = [(0, 1), (1, 2), (2, 0), (2, 3)]\nlabels = " + repr(LABELS) + "\n")
+	binaryPath = str(tmp_path / "small.vgb")
+	convert(modulePath, binaryPath)
+	(module, binary) = (openGraph(modulePath), openGraph(binaryPath))
+	assert binary.vertexCount == module.vertexCount
+	assert numpy.array_equal(binary.edges, numpy.asarray(module.edges))
+	assert binary.labels == module.labels
+
+def testBadMagic(tmp_path):
+	path = str(tmp_path / "bad.vgb")
+	writeBinaryGraph(path, 4, EDGES)
+	with open(path, "r+b") as file:
+		file.write(b"NOTGRAPH")
+	with pytest.raises(ValueError):
+		readBinaryGraph(path)
+
+@pytest.mark.parametrize("cut", (1, 8, 40))
+def testTruncated(tmp_path, cut):
+	path = str(tmp_path / "cut.vgb")
+	writeBinaryGraph(path, 4, EDGES, LABELS, numpy.zeros((4, 3)))
+	size = os.path.getsize(path)
+	# into the label text, into the edges or positions and into the header
+	for length in (size - cut, HEADER.size + cut, min(cut, HEADER.size - 1)):
+		with open(path, "r+b") as file:
+			file.truncate(length)
+		with pytest.raises(ValueError):
+			readBinaryGraph(path)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import numpy
+from src.layout import Layout
+from src.graphStream import GraphStream, parseEvent
+
+def startLayout(vertexCount, edges):
+	# every vertex's position encodes its original index, so misaligned rows show up
+	layout = Layout(vertexCount, edges)
+	layout.positions = numpy.stack((numpy.arange(vertexCount), numpy.arange(vertexCount) * 10.0), axis=1)
+	return layout
+
+def applyLines(stream, layout, *lines):
+	events = [parseEvent(line) for line in lines]
+	return stream.apply(layout, events, (0, 0), 1.0, 4.0, rng=numpy.random.RandomState(1))
+
+def namedEdges(stream, layout):
+	return sorted(tuple(sorted((stream.names[first], stream.names[second]))) for (first, second) in layout.currentAdjacency().edgeList().tolist())
+
+def assertConsistent(stream, layout):
+	# names, positions, the CSR rows and the edge list all describe the same vertices
+	adjacency = layout.currentAdjacency()
+	vertexCount = layout.numOfVertices()
+	assert len(stream.names) == vertexCount == adjacency.numOfVertices()
+	assert stream.indexOf == {name: index for (index, name) in enumerate(stream.names)}
+	edges = adjacency.edgeList()
+	for vertex in range(vertexCount):
+		incident = edges[adjacency.incidentEdges(vertex)]
+		assert numpy.all((incident[:, 0] == vertex) | (incident[:, 1] == vertex))
+		others = numpy.where(incident[:, 0] == vertex, incident[:, 1], incident[:, 0])
+		assert sorted(others.tolist()) == sorted(adjacency.neighborsOf(vertex).tolist())
+
+def testRemoveVertexWithIncidentEdges():
+	stream = GraphStream(5)
+	layout = startLayout(5, [(0, 1), (1, 2), (2, 3), (3, 4), (4, 0), (1, 3)])
+	applyLines(stream, layout, "-v 1")
+	assert stream.names == ["0", "2", "3", "4"]
+	assert namedEdges(stream, layout) == [("0", "4"), ("2", "3"), ("3", "4")]
+	# rows shifted down past the removed vertex with their positions
+	assert numpy.array_equal(layout.positions[:, 0], [0, 2, 3, 4])
+	assertConsistent(stream, layout)
+	assert sorted(stream.names[index] for index in layout.currentAdjacency().neighborsOf(stream.indexOf["3"]).tolist()) == ["2", "4"]
+
+def testDeleteThenReinsertVertex():
+	stream = GraphStream(4)
+	layout = startLayout(4, [(0, 1), (1, 2), (2, 3)])
+	applyLines(stream, layout, "-v 1", "+v 1", "+e 1 3")
+	# the reinserted vertex is a new one at the end, without the old vertex's edges
+	assert stream.names == ["0", "2", "3", "1"]
+	assert namedEdges(stream, layout) == [("1", "3"), ("2", "3")]
+	assert numpy.array_equal(layout.positions[0:3, 0], [0, 2, 3])
+	assertConsistent(stream, layout)
+	applyLines(stream, layout, "-v 1")
+	applyLines(stream, layout, "+e 1 0")
+	assert stream.names == ["0", "2", "3", "1"]
+	assert namedEdges(stream, layout) == [("0", "1"), ("2", "3")]
+	assertConsistent(stream, layout)
+
+def testRemoveEdgeInsertedInSameBatch():
+	stream = GraphStream(3)
+	layout = startLayout(3, [(0, 1)])
+	applyLines(stream, layout, "+e 1 2", "+e 2 x", "-e 2 1", "-e x 2")
+	# the inserted edges are gone again, the new endpoint stays
+	assert stream.names == ["0", "1", "2", "x"]
+	assert namedEdges(stream, layout) == [("0", "1")]
+	assertConsistent(stream, layout)
+
+def testRemoveOnlyOneOfParallelEdges():
+	stream = GraphStream(3)
+	layout = startLayout(3, [(0, 1), (1, 0), (1, 2)])
+	applyLines(stream, layout, "-e 0 1", "-v 2")
+	assert namedEdges(stream, layout) == [("0", "1")]
+	assertConsistent(stream, layout)
+
+def testMixedBatchKeepsRowsAligned():
+	stream = GraphStream(6)
+	layout = startLayout(6, [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5)])
+	touched = applyLines(stream, layout, "+v a", "+e a 5", "-v 2", "-e 4 5", "+e a 0", "-v 0", "+e 3 b")
+	assert stream.names == ["1", "3", "4", "5", "a", "b"]
+	assert namedEdges(stream, layout) == [("3", "4"), ("3", "b"), ("5", "a")]
+	assert numpy.array_equal(layout.positions[0:4, 0], [1, 3, 4, 5])
+	assert numpy.all((touched >= 0) & (touched < layout.numOfVertices()))
+	assertConsistent(stream, layout)
+
+def testUnknownNamesAreIgnored():
+	stream = GraphStream(2)
+	layout = startLayout(2, [(0, 1)])
+	applyLines(stream, layout, "-v nobody", "-e 0 nobody", "-e 0 0")
+	assert stream.names == ["0", "1"]
+	assert namedEdges(stream, layout) == [("0", "1")]
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+from multiprocessing import shared_memory
+import numpy, pytest
+from src.forceKernel import repulsiveDisplacement
+from src.parallelRepulsion import RepulsionPool
+
+# three kernel blocks, so the two workers get tiles of different lengths
+VERTEX_COUNT = 600
+K_VALUE = 12.0
+SEED = 1
+
+def randomPositions(dimension, rng):
+	positions = rng.random_sample((VERTEX_COUNT, dimension)) * 500
+	# coincident vertices make both paths jitter
+	positions[1:4] = positions[0]
+	return positions
+
+@pytest.mark.parametrize("dimension,colored", ((2, False), (2, True), (3, False), (3, True)))
+def testPoolMatchesSerialKernel(dimension, colored):
+	rng = numpy.random.RandomState(SEED)
+	positions = randomPositions(dimension, rng)
+	colors = rng.random_sample((VERTEX_COUNT, 3)) * 256 if colored else None
+	serial = repulsiveDisplacement(positions, K_VALUE, colors, numpy.random.RandomState(SEED))
+	pool = RepulsionPool(2)
+	pool.minSize = 0
+	try:
+		pooled = pool.repulsiveDisplacement(positions, K_VALUE, colors, numpy.random.RandomState(SEED))
+		names = [memory.name for memory in pool.buffers.values()]
+	finally:
+		pool.close()
+	assert numpy.array_equal(pooled, serial)
+	# close unlinks every shared segment
+	for name in names:
+		with pytest.raises(FileNotFoundError):
+			shared_memory.SharedMemory(name=name)